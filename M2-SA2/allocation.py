@@ -0,0 +1,332 @@
+import heapq
+from bisect import bisect_left, insort
+from models import MemoryBlock
+from hole_index import HoleIndex
+
+#Memory allocation policies the simulator dispatches to
+#Each policy owns the index of free holes it needs to find a block without scanning the whole block list.
+#Every policy provides insert, remove, resize, clear, largest, __len__ and find(size) on top of the
+#shared behaviour of AllocationPolicy below.
+
+#Defines the behaviour shared by all allocation policies
+class AllocationPolicy:
+    name = ""
+    label = ""
+    #Whether the policy splits and merges blocks itself, in which case CH and SC leave memory alone
+    fixed_layout = False
+    #Number of index entries find has looked at so far, for the profiling counters
+    scanned = 0
+
+    #Connects the policy to a simulator and indexes the free blocks it currently has
+    def attach(self, sim):
+        self.sim = sim
+        self.clear()
+        block = sim.head
+        while block is not None:
+            if block.is_free:
+                self.insert(block)
+            block = block.next
+
+    #Returns the state the policy keeps besides its index of holes, for checkpoints
+    def save_state(self):
+        return {}
+
+    #Restores a state returned by save_state
+    def load_state(self, state):
+        pass
+
+    #Returns the largest request the policy could ever satisfy, with all memory free
+    def capacity(self):
+        return self.sim.total_memory_size
+
+    #Returns how much memory a request of the given size actually takes
+    def block_size_for(self, size):
+        return size
+
+    #Takes the hole returned by find and carves the allocated block out of it
+    #The rest of the hole becomes a new hole right after the allocated block
+    def carve(self, block, size):
+        self.remove(block)
+        if block.size > size:
+            new_hole = MemoryBlock(
+                start=block.start + size,
+                end=block.end,
+                size=block.size - size
+            )
+            self.sim._link_after(block, new_hole)
+            self.insert(new_hole)
+            block.end = block.start + size - 1
+            block.size = size
+        return block
+
+    #Puts a block that was just freed back into the index, merging it right away in eager coalescing mode
+    def release(self, block):
+        if self.sim.eager_coalescing:
+            self.sim._merge_with_neighbors(block)
+        else:
+            self.insert(block)
+
+#Picks the lowest-addressed hole that fits
+class FirstFitPolicy(HoleIndex, AllocationPolicy):
+    name = "first_fit"
+    label = "First Fit"
+
+    def find(self, size):
+        return self.first_fit(size)
+
+#Picks the first hole that fits, starting from where the previous allocation ended and wrapping around
+class NextFitPolicy(HoleIndex, AllocationPolicy):
+    name = "next_fit"
+    label = "Next Fit"
+
+    def __init__(self):
+        super().__init__()
+        self.rover = 0
+
+    #The search resumes in the hole that spans the rover, which eager coalescing may have merged with the holes
+    #before it, then goes on with the holes after the rover
+    def find(self, size):
+        block = self.hole_at(self.rover)
+        if block is None or block.size < size:
+            block = self.first_fit_from(self.rover, size)
+        if block is None:
+            block = self.first_fit(size)
+        if block is not None:
+            self.rover = block.start + size
+        return block
+
+    def save_state(self):
+        return {"rover": self.rover}
+
+    def load_state(self, state):
+        self.rover = state.get("rover", 0)
+
+#Picks the smallest hole that fits, preferring the lowest address between holes of the same size
+#Holes are kept in a list ordered by (size, start), so a lookup is a binary search
+class BestFitPolicy(AllocationPolicy):
+    name = "best_fit"
+    label = "Best Fit"
+
+    def __init__(self):
+        self._holes = []
+        self._keys = {}
+        self._blocks = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def insert(self, block):
+        key = (block.size, block.start)
+        insort(self._holes, key)
+        self._keys[block.start] = key
+        self._blocks[block.start] = block
+
+    def remove(self, block):
+        key = self._keys.pop(block.start, None)
+        if key is None:
+            return
+        del self._holes[bisect_left(self._holes, key)]
+        del self._blocks[block.start]
+
+    def resize(self, block):
+        self.remove(block)
+        self.insert(block)
+
+    def clear(self):
+        self._holes = []
+        self._keys = {}
+        self._blocks = {}
+
+    def largest(self):
+        return self._holes[-1][0] if self._holes else 0
+
+    def find(self, size):
+        i = bisect_left(self._holes, (size, -1))
+        self.scanned += 1
+        if i == len(self._holes):
+            return None
+        return self._blocks[self._holes[i][1]]
+
+#Picks the largest hole, preferring the lowest address between holes of the same size
+#Holes are kept in a max-heap; entries of holes that were removed or resized are skipped lazily
+class WorstFitPolicy(AllocationPolicy):
+    name = "worst_fit"
+    label = "Worst Fit"
+
+    def __init__(self):
+        self._heap = []
+        self._blocks = {}
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def insert(self, block):
+        self._blocks[block.start] = block
+        heapq.heappush(self._heap, (-block.size, block.start))
+        if len(self._heap) > 2 * len(self._blocks) + 64:
+            self._heap = [(-b.size, start) for start, b in self._blocks.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, block):
+        self._blocks.pop(block.start, None)
+
+    def resize(self, block):
+        self.insert(block)
+
+    def clear(self):
+        self._heap = []
+        self._blocks = {}
+
+    #Helper method that drops heap entries that no longer describe a hole in the index
+    def _top(self):
+        while self._heap:
+            negative_size, start = self._heap[0]
+            block = self._blocks.get(start)
+            if block is not None and block.size == -negative_size:
+                return block
+            heapq.heappop(self._heap)
+        return None
+
+    def largest(self):
+        block = self._top()
+        return block.size if block else 0
+
+    def find(self, size):
+        block = self._top()
+        self.scanned += 1
+        if block is None or block.size < size:
+            return None
+        return block
+
+#Buddy system allocator
+#Memory is split into power-of-two blocks, requests are rounded up to a power of two and a freed block merges
+#with its buddy straight away. Free blocks are kept in one free list per order (block size 2^order).
+class BuddyPolicy(AllocationPolicy):
+    name = "buddy"
+    label = "Buddy System"
+    fixed_layout = True
+
+    def __init__(self):
+        self._free = {}
+        self._heaps = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    #Splits a memory size into the aligned power-of-two chunks that the buddy system manages separately
+    @staticmethod
+    def chunks(total_memory):
+        chunks = []
+        start = 0
+        for order in range(total_memory.bit_length() - 1, -1, -1):
+            if total_memory & (1 << order):
+                chunks.append((start, 1 << order))
+                start += 1 << order
+        return chunks
+
+    #Connects the policy and, on fresh memory, splits the initial block into power-of-two chunks
+    def attach(self, sim):
+        self.sim = sim
+        self._chunks = self.chunks(sim.total_memory_size)
+        head = sim.head
+        if head.is_free and head.next is None and len(self._chunks) > 1:
+            block = head
+            for start, size in self._chunks[:-1]:
+                rest = MemoryBlock(start + size, block.end, block.size - size)
+                block.end = start + size - 1
+                block.size = size
+                sim._link_after(block, rest)
+                block = rest
+        super().attach(sim)
+
+    def capacity(self):
+        return self._chunks[0][1] if self._chunks else 0
+
+    def block_size_for(self, size):
+        return 1 << (size - 1).bit_length()
+
+    @staticmethod
+    def _order(size):
+        return size.bit_length() - 1
+
+    def insert(self, block):
+        order = self._order(block.size)
+        self._free.setdefault(order, {})[block.start] = block
+        heapq.heappush(self._heaps.setdefault(order, []), block.start)
+        self._count += 1
+
+    def remove(self, block):
+        if self._free.get(self._order(block.size), {}).pop(block.start, None) is not None:
+            self._count -= 1
+
+    def clear(self):
+        self._free = {}
+        self._heaps = {}
+        self._count = 0
+
+    def largest(self):
+        for order in sorted(self._free, reverse=True):
+            if self._free[order]:
+                return 1 << order
+        return 0
+
+    #Returns the lowest-addressed block of the smallest order that can hold the request
+    def find(self, size):
+        needed = self._order(self.block_size_for(size))
+        for order in sorted(self._free):
+            self.scanned += 1
+            if order < needed or not self._free[order]:
+                continue
+            heap = self._heaps[order]
+            while heap[0] not in self._free[order]:
+                heapq.heappop(heap)
+            return self._free[order][heap[0]]
+        return None
+
+    #Halves the block until it is the smallest power of two that holds the request, freeing the upper halves
+    def carve(self, block, size):
+        self.remove(block)
+        needed = self.block_size_for(size)
+        while block.size > needed:
+            half = block.size // 2
+            upper = MemoryBlock(block.start + half, block.end, half)
+            block.end = block.start + half - 1
+            block.size = half
+            self.sim._link_after(block, upper)
+            self.insert(upper)
+        return block
+
+    #Helper method that returns the size of the chunk an address belongs to
+    def _chunk_size(self, address):
+        for start, size in self._chunks:
+            if address < start + size:
+                return size
+        return 0
+
+    #Merges a freed block with its buddy for as long as the buddy is free too
+    def release(self, block):
+        while block.size < self._chunk_size(block.start):
+            if block.start % (2 * block.size) == 0:
+                lower, buddy = block, block.next
+            else:
+                lower, buddy = block.prev, block.prev
+            if buddy is None or not buddy.is_free or buddy.size != block.size:
+                break
+            self.remove(buddy)
+            self.sim._absorb_next(lower)
+            block = lower
+        self.insert(block)
+
+ALLOCATION_POLICIES = {
+    policy.name: policy for policy in (FirstFitPolicy, NextFitPolicy, BestFitPolicy, WorstFitPolicy, BuddyPolicy)
+}
+
+#Function that returns an allocation policy from its name, or the policy itself when one is given
+def get_allocation_policy(policy):
+    if not isinstance(policy, str):
+        return policy
+    try:
+        return ALLOCATION_POLICIES[policy]()
+    except KeyError:
+        raise ValueError(f"Unknown allocation policy '{policy}'. Choose from: {', '.join(ALLOCATION_POLICIES)}.")
@@ -0,0 +1,267 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from simulator import MemorySimulator
+from allocation import ALLOCATION_POLICIES
+from events import OFF
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#Benchmark suite for the hot paths of MemorySimulator
+#Every case streams a seeded synthetic workload through the simulator in a fresh worker process and reports:
+#  - steps per second and processes per second of the fastest of several uninstrumented runs
+#  - latency percentiles of allocate, free_memory, coalesce, compact and step from a second, timed run
+#  - the peak resident memory of the worker process over the uninstrumented runs
+#Results are saved as JSON, and the compare command reports the changes between two result files.
+
+MEMORY_SIZE = 10000
+CH_INTERVAL = 5
+SC_INTERVAL = 20
+TIMED_OPERATIONS = ("allocate", "free_memory", "coalesce", "compact", "step")
+PERCENTILES = (50, 90, 99)
+#Uninstrumented runs are repeated at least MIN_REPEATS times and until they took MIN_DURATION seconds in total
+MIN_REPEATS = 3
+MIN_DURATION = 1.0
+
+#Workload generators; each yields {'size', 'burst', 'arrival'} entries for n processes from a seeded random source
+#Arrival rates keep the offered load near the memory size, so queues stay bounded at every workload size
+
+#Many small, short processes
+def small_many(n, rng):
+    for i in range(n):
+        yield {'size': rng.randint(1, 50), 'burst': rng.randint(1, 10), 'arrival': i // 60}
+
+#Mid-sized processes with a few huge ones that take a third to half of memory
+def few_huge(n, rng):
+    for i in range(n):
+        if rng.random() < 0.01:
+            size = rng.randint(MEMORY_SIZE // 3, MEMORY_SIZE // 2)
+        else:
+            size = rng.randint(50, 500)
+        yield {'size': size, 'burst': rng.randint(5, 30), 'arrival': i * 2 // 3}
+
+#Processes that only run for one or two ticks, so blocks are allocated and freed all the time
+def high_churn(n, rng):
+    for i in range(n):
+        yield {'size': rng.randint(10, 300), 'burst': rng.randint(1, 2), 'arrival': i // 30}
+
+#Processes that hold their memory for hundreds of ticks
+def long_bursts(n, rng):
+    for i in range(n):
+        yield {'size': rng.randint(20, 400), 'burst': rng.randint(100, 1000), 'arrival': i * 12}
+
+SCENARIOS = {
+    generator.__name__: generator for generator in (small_many, few_huge, high_churn, long_bursts)
+}
+
+#Helper function that creates the simulator of a benchmark case
+def _make_simulator(case):
+    workload = SCENARIOS[case["scenario"]](case["processes"], random.Random(case["seed"]))
+    return MemorySimulator(MEMORY_SIZE, CH_INTERVAL, SC_INTERVAL, workload, None,
+                           event_driven=case["event_driven"], policy=case["policy"], log_level=OFF)
+
+#Helper function that wraps a method of one simulator so every call appends its duration in nanoseconds to samples
+def _timed(method, samples):
+    perf_counter_ns = time.perf_counter_ns
+
+    def timed(*args):
+        start = perf_counter_ns()
+        result = method(*args)
+        samples.append(perf_counter_ns() - start)
+        return result
+    return timed
+
+#Helper function that summarizes the durations of one operation
+def _latency_summary(samples):
+    if not samples:
+        return {"count": 0}
+    samples.sort()
+    summary = {"count": len(samples), "total_ms": round(sum(samples) / 1e6, 3)}
+    for percentile in PERCENTILES:
+        index = min(len(samples) - 1, len(samples) * percentile // 100)
+        summary[f"p{percentile}_us"] = round(samples[index] / 1e3, 3)
+    summary["max_us"] = round(samples[-1] / 1e3, 3)
+    return summary
+
+#Helper function that returns the peak resident memory of the current process in MB, when the platform reports it
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Linux reports kilobytes, macOS bytes
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+#Function that runs one benchmark case, meant to be called in its own worker process
+def run_case(case):
+    wall = None
+    total = 0.0
+    repeats = 0
+    while repeats < MIN_REPEATS or total < MIN_DURATION:
+        sim = _make_simulator(case)
+        steps = 0
+        start = time.perf_counter()
+        while sim.step():
+            steps += 1
+        elapsed = time.perf_counter() - start
+        wall = elapsed if wall is None else min(wall, elapsed)
+        total += elapsed
+        repeats += 1
+    #Read before the timed run, whose lists of samples would count towards the peak
+    peak_rss_mb = _peak_rss_mb()
+
+    timed_sim = _make_simulator(case)
+    samples = {name: [] for name in TIMED_OPERATIONS}
+    for name in TIMED_OPERATIONS:
+        setattr(timed_sim, name, _timed(getattr(timed_sim, name), samples[name]))
+    while timed_sim.step():
+        pass
+
+    return dict(case, **{
+        "steps": steps,
+        "makespan": sim.timeline,
+        "completed": sim.processes_completed,
+        "rejected": sim.processes_rejected,
+        "repeats": repeats,
+        "wall_seconds": round(wall, 4),
+        "steps_per_second": round(steps / wall, 1) if wall else None,
+        "processes_per_second": round(case["processes"] / wall, 1) if wall else None,
+        "peak_rss_mb": peak_rss_mb,
+        "operations": {name: _latency_summary(samples[name]) for name in TIMED_OPERATIONS},
+    })
+
+#Function that runs every combination of scenarios and workload sizes, each case in a fresh process
+#so that the peak memory of one case is not inherited by the next
+def run_suite(scenarios, sizes, policy="first_fit", event_driven=True, seed=0, progress=None):
+    cases = [
+        {"scenario": scenario, "processes": size, "policy": policy, "event_driven": event_driven, "seed": seed}
+        for scenario in scenarios for size in sizes
+    ]
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case,))
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+#Helper function that returns the commit of the working tree, when it is a git checkout
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+#Function that describes the machine and code a set of results was measured on
+def environment():
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "memory_size": MEMORY_SIZE,
+        "ch_interval": CH_INTERVAL,
+        "sc_interval": SC_INTERVAL,
+    }
+
+#Helper function that returns the key that matches the same case across two result files
+def _case_key(result):
+    return (result["scenario"], result["processes"], result["policy"], result["event_driven"], result["seed"])
+
+#Function that compares two result files and returns one row per case found in both, and whether any case
+#lost more than threshold of its steps per second
+def compare(old, new, threshold=0.1):
+    old_results = {_case_key(r): r for r in old["results"]}
+    rows = []
+    regressed = False
+    for result in new["results"]:
+        before = old_results.get(_case_key(result))
+        if before is None or not before["steps_per_second"] or not result["steps_per_second"]:
+            continue
+        change = result["steps_per_second"] / before["steps_per_second"] - 1
+        row = {
+            "scenario": result["scenario"], "processes": result["processes"],
+            "old_steps_per_second": before["steps_per_second"], "new_steps_per_second": result["steps_per_second"],
+            "change": round(change, 4),
+        }
+        for name in TIMED_OPERATIONS:
+            old_p50 = before["operations"][name].get("p50_us")
+            new_p50 = result["operations"][name].get("p50_us")
+            row[f"{name}_p50_change"] = round(new_p50 / old_p50 - 1, 4) if old_p50 and new_p50 else None
+        if change < -threshold:
+            row["regression"] = True
+            regressed = True
+        rows.append(row)
+    return rows, regressed
+
+#Helper function that prints one line per finished case
+def _print_result(result):
+    step = result["operations"]["step"]
+    print(f"{result['scenario']:>12} n={result['processes']:<8} {result['steps_per_second']:>12} steps/s  "
+          f"step p50 {step.get('p50_us')} us  p99 {step.get('p99_us')} us  peak {result['peak_rss_mb']} MB",
+          file=sys.stderr)
+
+#Helper function that builds the command line interface of the benchmark suite
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the memory allocation simulator.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("--scenario", choices=list(SCENARIOS), nargs="+", default=list(SCENARIOS),
+                            help="workload scenarios (default: all)")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                            help="numbers of processes per workload, up to 1000000 (default: 100 1000 10000 100000)")
+    run_parser.add_argument("--policy", choices=list(ALLOCATION_POLICIES), default="first_fit",
+                            help="allocation policy (default: first_fit)")
+    run_parser.add_argument("--tick", action="store_true", help="advance one tick per step instead of jumping between events")
+    run_parser.add_argument("--seed", type=int, default=0, help="seed of the workload generators (default: 0)")
+    run_parser.add_argument("-o", "--output", help="file to save the results to as JSON (default: standard output)")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("old", help="results of the baseline")
+    compare_parser.add_argument("new", help="results to check against the baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="drop in steps per second that counts as a regression (default: 0.1)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        rows, regressed = compare(old, new, args.threshold)
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        sys.exit(1 if regressed else 0)
+
+    if any(size <= 0 for size in args.sizes):
+        parser.error("Sizes must be numbers > 0.")
+    results = run_suite(args.scenario, args.sizes, args.policy, not args.tick, args.seed, _print_result)
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+from multiprocessing import Pool
+
+#What-if runs branched from one point of a simulation
+#Every branch continues its own MemorySimulator.fork() of the simulation, so the ticks before the branch point are
+#never simulated again, and with a process pool the simulation is sent to each worker only once.
+
+#Simulation the pool workers fork their branches from, set once per worker by _set_base
+_base = None
+
+#Function that continues a fork of a simulation under one variant and returns its metrics at the end
+#A variant is a dict that may hold:
+#  actions     - names of simulator methods to call right away, like ["compact"] or ["coalesce", "compact"]
+#  ch_interval - new coalescing interval
+#  sc_interval - new compaction interval
+#  max_time    - time at which to stop the branch
+def continue_run(sim, variant):
+    if "ch_interval" in variant:
+        sim.ch_time = variant["ch_interval"]
+    if "sc_interval" in variant:
+        sim.sc_time = variant["sc_interval"]
+    if variant.get("actions"):
+        for action in variant["actions"]:
+            getattr(sim, action)()
+        #Memory changed, so waiting processes get to try again on the next tick
+        sim._retry_waiting = True
+
+    #The limit is checked before stepping, so every branch stops on the same tick whatever its time mode
+    max_time = variant.get("max_time")
+    while not sim.is_done() and (max_time is None or sim.next_step_time() <= max_time):
+        sim.step()
+    if max_time is not None:
+        sim.skip_to(max_time)
+    result = sim.metrics_snapshot()
+    result["variant"] = variant
+    return result
+
+#Helper function that stores the simulation a pool worker forks its branches from
+def _set_base(sim):
+    global _base
+    _base = sim
+
+#Helper function that runs one branch inside a pool worker
+def _run_branch(task):
+    branch_func, variant = task
+    return branch_func(_base.fork(), variant)
+
+#Function that runs branch_func(fork, variant) for every variant, each on its own fork of the simulation
+#Results come back in the order of the variants. With jobs other than 1 the branches run across a process pool;
+#branch_func must then be a top-level function and the simulation must be picklable (a process list or workload file)
+def run_branches(sim, variants, branch_func=continue_run, jobs=None):
+    variants = list(variants)
+    if jobs == 1 or len(variants) <= 1:
+        return [branch_func(sim.fork(), variant) for variant in variants]
+    with Pool(processes=jobs, initializer=_set_base, initargs=(sim,)) as pool:
+        tasks = [(branch_func, variant) for variant in variants]
+        return pool.map(_run_branch, tasks, chunksize=max(1, len(tasks) // (4 * (jobs or os.cpu_count() or 1))))
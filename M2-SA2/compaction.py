@@ -0,0 +1,162 @@
+from models import MemoryBlock
+from events import DEBUG, BlockMoved
+
+#Storage Compaction (SC) strategies the simulator can be configured with
+#Every strategy slides allocated blocks of some address range together and reports how much work that took
+
+#Defines the amount of work done by one compaction pass
+class CompactionResult:
+    __slots__ = ("strategy", "bytes_moved", "blocks_moved")
+
+    def __init__(self, strategy, bytes_moved=0, blocks_moved=0):
+        self.strategy = strategy
+        self.bytes_moved = bytes_moved
+        self.blocks_moved = blocks_moved
+
+#Helper function that slides the allocated blocks from first up to (not including) stop down to the start of first
+#The free blocks in that range are collapsed into one hole that follows the last allocated block
+def slide_down(sim, first, stop, result):
+    before = first.prev
+    current_address = first.start
+    last = before
+    spare_hole = None
+
+    block = first
+    while block is not stop:
+        next_block = block.next
+        if block.is_free:
+            sim.policy.remove(block)
+            if spare_hole is None:
+                spare_hole = block
+            block = next_block
+            continue
+
+        old_start = block.start
+        block.start = current_address
+        block.end = block.start + block.size - 1
+        block.prev = last
+        if last is None:
+            sim.head = block
+        else:
+            last.next = block
+        last = block
+        if block.start != old_start:
+            result.bytes_moved += block.size
+            result.blocks_moved += 1
+
+        if sim.log_level <= DEBUG:
+            sim.sink(BlockMoved(sim.timeline, block.pid, old_start, block.start))
+        current_address = block.end + 1
+        block = next_block
+
+    end_address = stop.start if stop is not None else sim.total_memory_size
+    if current_address < end_address:
+        free_block = spare_hole if spare_hole is not None else MemoryBlock(0, 0, 0)
+        free_block.start = current_address
+        free_block.end = end_address - 1
+        free_block.size = end_address - current_address
+        free_block.prev = last
+        if last is None:
+            sim.head = free_block
+        else:
+            last.next = free_block
+        last = free_block
+        sim.policy.insert(free_block)
+
+    last.next = stop
+    if stop is not None:
+        stop.prev = last
+
+#Helper function that widens a range of blocks over the free blocks right outside it, which costs nothing to include
+def _widen(first, last):
+    while first.prev is not None and first.prev.is_free:
+        first = first.prev
+    while last.next is not None and last.next.is_free:
+        last = last.next
+    return first, last.next
+
+#Slides every allocated block down to address 0, leaving a single hole at the end of memory
+class FullCompaction:
+    name = "full"
+
+    def compact(self, sim):
+        result = CompactionResult(self.name)
+        if sim.head is not None:
+            slide_down(sim, sim.head, None, result)
+        return result
+
+#Moves the fewest bytes needed for the first waiting process to fit
+#Finds the run of blocks with enough free space whose moved blocks add up to the fewest bytes and only compacts that run.
+#A run starts at a hole: allocated blocks before the first hole of a run have nothing to slide into and stay in place
+class MinimalMoveCompaction:
+    name = "min_move"
+
+    def compact(self, sim):
+        result = CompactionResult(self.name)
+        head_of_queue = next(iter(sim.waiting.values()), None)
+        if head_of_queue is None:
+            return result
+        needed = head_of_queue.size
+        if needed <= sim.policy.largest() or needed > sim.free_size:
+            return result
+
+        blocks = sim.memory_blocks
+        best = None
+        left = 0
+        free_in_window = 0
+        moved_in_window = 0
+        for right, block in enumerate(blocks):
+            if block.is_free:
+                free_in_window += block.size
+            elif left == right:
+                left += 1
+                continue
+            else:
+                moved_in_window += block.size
+            while free_in_window >= needed:
+                if best is None or moved_in_window < best[0]:
+                    best = (moved_in_window, left, right)
+                free_in_window -= blocks[left].size
+                left += 1
+                while left <= right and not blocks[left].is_free:
+                    moved_in_window -= blocks[left].size
+                    left += 1
+
+        first, stop = _widen(blocks[best[1]], blocks[best[2]])
+        slide_down(sim, first, stop, result)
+        return result
+
+#Compacts only the range between the two largest holes, merging them into one hole at the end of that range
+class LargestHolesCompaction:
+    name = "largest_holes"
+
+    def compact(self, sim):
+        result = CompactionResult(self.name)
+        largest = []
+        block = sim.head
+        while block is not None:
+            if block.is_free:
+                largest.append(block)
+                largest.sort(key=lambda hole: -hole.size)
+                del largest[2:]
+            block = block.next
+        if len(largest) < 2:
+            return result
+
+        low, high = sorted(largest, key=lambda hole: hole.start)
+        first, stop = _widen(low, high)
+        slide_down(sim, first, stop, result)
+        return result
+
+COMPACTION_STRATEGIES = {
+    strategy.name: strategy for strategy in (FullCompaction, MinimalMoveCompaction, LargestHolesCompaction)
+}
+
+#Function that returns a compaction strategy from its name, or the strategy itself when one is given
+def get_compaction_strategy(strategy):
+    if not isinstance(strategy, str):
+        return strategy
+    try:
+        return COMPACTION_STRATEGIES[strategy]()
+    except KeyError:
+        raise ValueError(f"Unknown compaction strategy '{strategy}'. Choose from: {', '.join(COMPACTION_STRATEGIES)}.")
@@ -0,0 +1,195 @@
+import threading
+from collections import deque
+
+#Structured events emitted by the simulator and the sinks that consume them
+#An event only stores its fields; the log line is formatted when a sink actually needs the text,
+#so events that are filtered out or dropped from a full buffer never pay for string formatting.
+
+#Log levels, lowest is most verbose
+DEBUG = 10
+INFO = 20
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "off": OFF}
+
+#Defines the fields shared by every simulation event
+class SimEvent:
+    __slots__ = ("time",)
+    kind = ""
+    level = INFO
+    fields = ("time",)
+
+    def __init__(self, time):
+        self.time = time
+
+    #Returns the log line of the event
+    def message(self):
+        raise NotImplementedError
+
+    #Returns the event as a plain dict, for sinks that store or send events instead of text
+    def as_dict(self):
+        data = {"kind": self.kind}
+        for field in self.fields:
+            data[field] = getattr(self, field)
+        return data
+
+    def __str__(self):
+        return self.message()
+
+#A new tick of the timeline has started
+class TickStarted(SimEvent):
+    __slots__ = ()
+    kind = "tick"
+
+    def message(self):
+        return f"\n##### time = {self.time} #####"
+
+#A waiting process is about to try to allocate memory
+class AllocationAttempt(SimEvent):
+    __slots__ = ("pid", "size")
+    kind = "attempt"
+    level = DEBUG
+    fields = ("time", "pid", "size")
+
+    def __init__(self, time, pid, size):
+        self.time = time
+        self.pid = pid
+        self.size = size
+
+    def message(self):
+        return f"Time {self.time}: Attempting to allocate Process {self.pid} (Size: {self.size})"
+
+#A process was given a memory block
+class Allocated(SimEvent):
+    __slots__ = ("pid", "start", "end")
+    kind = "allocated"
+    fields = ("time", "pid", "start", "end")
+
+    def __init__(self, time, pid, start, end):
+        self.time = time
+        self.pid = pid
+        self.start = start
+        self.end = end
+
+    def message(self):
+        return f"Time {self.time} - Allocated Process {self.pid} to Block [{self.start}-{self.end}]"
+
+#A process finished and its memory block was freed
+class Finished(Allocated):
+    __slots__ = ()
+    kind = "finished"
+
+    def message(self):
+        return f"Time {self.time} - Process {self.pid} FINISHED. Freed Block [{self.start}-{self.end}]"
+
+#A process was rejected because it can never be allocated
+class Rejected(SimEvent):
+    __slots__ = ("pid", "reason")
+    kind = "rejected"
+    fields = ("time", "pid", "reason")
+
+    def __init__(self, time, pid, reason):
+        self.time = time
+        self.pid = pid
+        self.reason = reason
+
+    def message(self):
+        return f"Time {self.time} - Process {self.pid} REJECTED: {self.reason}"
+
+#Coalescing Holes (CH) ran
+class CoalesceStarted(SimEvent):
+    __slots__ = ()
+    kind = "coalesce"
+
+    def message(self):
+        return "- Running Coalescing (CH)"
+
+#Storage Compaction (SC) ran
+class CompactionStarted(SimEvent):
+    __slots__ = ()
+    kind = "compact"
+
+    def message(self):
+        return "- Running Compaction (SC)"
+
+#Compaction slid an allocated block to a new address
+class BlockMoved(SimEvent):
+    __slots__ = ("pid", "old_start", "new_start")
+    kind = "moved"
+    level = DEBUG
+    fields = ("time", "pid", "old_start", "new_start")
+
+    def __init__(self, time, pid, old_start, new_start):
+        self.time = time
+        self.pid = pid
+        self.old_start = old_start
+        self.new_start = new_start
+
+    def message(self):
+        return f"Compacted PID {self.pid}: Moved from {self.old_start} to {self.new_start}"
+
+#Defines the behaviour shared by all event sinks
+#A sink is called with every event at or above its level
+class EventSink:
+    def __init__(self, level=DEBUG):
+        self.level = level
+
+    def __call__(self, event):
+        raise NotImplementedError
+
+#Writes each event as a line of text through a function such as print
+class TextSink(EventSink):
+    def __init__(self, write, level=DEBUG):
+        super().__init__(level)
+        self.write = write
+
+    def __call__(self, event):
+        self.write(str(event))
+
+#Keeps the most recent events in a fixed-size buffer that another thread drains in batches
+#Events pushed while the previous batch was not drained yet are dropped oldest first once the buffer is full
+class RingBufferSink(EventSink):
+    def __init__(self, capacity=1000, level=DEBUG):
+        super().__init__(level)
+        self.capacity = capacity
+        self.dropped = 0
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if len(self._events) == self.capacity:
+                self.dropped += 1
+            self._events.append(event)
+
+    #Returns the events received since the last drain
+    def drain_events(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    #Returns the log lines of the events received since the last drain
+    def drain(self):
+        return [str(event) for event in self.drain_events()]
+
+#Passes each event on to several sinks, each filtering by its own level
+class TeeSink(EventSink):
+    def __init__(self, *sinks):
+        super().__init__(min(sink.level for sink in sinks))
+        self.sinks = sinks
+
+    def __call__(self, event):
+        level = getattr(event, "level", INFO)
+        for sink in self.sinks:
+            if level >= sink.level:
+                sink(event)
+
+#Function that turns the logger given to the simulator into a sink
+#None prints every event, a sink is used as it is and any other callable is called with the formatted lines
+def make_sink(logger, level=DEBUG):
+    if not logger:
+        return TextSink(print, level)
+    if isinstance(logger, EventSink):
+        return logger
+    return TextSink(logger, level)
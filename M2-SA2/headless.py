@@ -0,0 +1,325 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from multiprocessing import Pool
+from simulator import MemorySimulator
+from workload import read_workload
+from compaction import COMPACTION_STRATEGIES
+from allocation import ALLOCATION_POLICIES
+from events import LEVELS, OFF
+from recording import TraceRecorder, Replay, trace_config
+from result_cache import ResultCache, DEFAULT_MAX_BYTES, workload_digest
+from pools import PartitionedSimulator, PLACEMENT_POLICIES, split_memory
+
+#Headless entry point of the memory allocation simulator, for machines without a display
+#Runs simulations to completion as fast as possible and reports summary metrics as CSV or JSON
+
+BLOCK_FIELDS = ["start", "end", "size", "is_free", "pid"]
+
+RESULT_FIELDS = [
+    "workload", "policy", "total_memory", "ch_interval", "sc_interval", "compaction", "processes",
+    "completed", "rejected", "makespan", "average_wait", "peak_fragmentation", "bytes_moved", "blocks_moved",
+]
+
+#Fields of a run with partitioned memory; peak_fragmentation is then the highest of any single pool
+PARTITIONED_FIELDS = RESULT_FIELDS + ["pools", "placement"]
+
+#Function that reads a whole workload file into the list of {'size', 'burst', 'arrival'} entries the simulator expects
+#JSON files hold a list of objects, CSV files need a header row with size and burst columns, JSONL files hold one
+#object per line; see workload.read_workload
+def load_workload(path):
+    return list(read_workload(path))
+
+#Function that runs one simulation to completion and returns its summary metrics
+#processes is a list of processes or the path of a workload file, which is then streamed
+#max_time caps how far the timeline may advance
+#Logging is off by default, so batch runs do not even build the log events
+#trace takes a TraceRecorder that records the run for replay
+#With a ResultCache a run with the same settings and workload as an earlier one returns the stored result instead,
+#and its stored trace when a trace is asked for and the stored one has the same checkpoint interval; digest is the
+#workload_digest of the processes when already known.
+#Runs that print their log are never taken from the cache.
+def run_simulation(total_memory, ch_interval, sc_interval, processes, workload="", event_driven=True, max_time=None,
+                   eager_coalescing=False, compaction="full", policy="first_fit", logger_func=None, log_level=OFF,
+                   trace=None, cache=None, digest=None):
+    key = None
+    if cache is not None and (logger_func is None or log_level >= OFF):
+        settings = {
+            "total_memory": total_memory, "ch_interval": ch_interval, "sc_interval": sc_interval,
+            "event_driven": event_driven, "max_time": max_time, "eager_coalescing": eager_coalescing,
+            "compaction": compaction, "policy": policy,
+        }
+        key = cache.key("summary", settings, digest if digest is not None else workload_digest(processes))
+        result = cache.get(key)
+        cached_trace = cache.get_trace(key) if result is not None and trace is not None else None
+        if cached_trace is not None and trace_config(cached_trace)["checkpoint_interval"] != trace.checkpoint_interval:
+            cached_trace = None
+        if result is not None and (trace is None or cached_trace is not None):
+            if trace is not None:
+                trace.load(cached_trace)
+            result["workload"] = workload
+            return result
+
+    sim = MemorySimulator(total_memory, ch_interval, sc_interval, processes, logger_func,
+                          event_driven=event_driven, eager_coalescing=eager_coalescing, compaction=compaction,
+                          policy=policy, log_level=log_level, trace=trace)
+
+    peak_fragmentation = 0.0
+    #The limit is checked before stepping, since an event-driven step can jump any distance past it
+    while not sim.is_done() and (max_time is None or sim.next_step_time() <= max_time):
+        sim.step()
+        fragmentation = sim.external_fragmentation()
+        if fragmentation > peak_fragmentation:
+            peak_fragmentation = fragmentation
+    if max_time is not None:
+        sim.skip_to(max_time)
+
+    #A process is first considered on its arrival tick (tick 1 at the earliest), so its wait is the number of
+    #ticks after that until allocation
+    average_wait = sim.total_wait / sim.processes_started if sim.processes_started else 0.0
+
+    result = {
+        "workload": workload,
+        "policy": sim.policy.name,
+        "total_memory": total_memory,
+        "ch_interval": ch_interval,
+        "sc_interval": sc_interval,
+        "compaction": sim.compaction.name,
+        "processes": sim.num_processes,
+        "completed": sim.processes_completed,
+        "rejected": sim.processes_rejected,
+        "makespan": sim.timeline,
+        "average_wait": round(average_wait, 4),
+        "peak_fragmentation": round(peak_fragmentation, 4),
+        "bytes_moved": sim.compaction_bytes_moved,
+        "blocks_moved": sim.compaction_blocks_moved,
+    }
+    if key is not None:
+        cache.put(key, result, trace.getvalue() if trace is not None else None)
+    return result
+
+#Function that runs one simulation with memory split into equal pools and returns its summary metrics
+#workers spreads the pools over that many processes; see pools.PartitionedSimulator
+def run_partitioned(total_memory, ch_interval, sc_interval, processes, pools, placement="round_robin", workers=None,
+                    workload="", event_driven=True, max_time=None, eager_coalescing=False, compaction="full",
+                    policy="first_fit"):
+    with PartitionedSimulator(split_memory(total_memory, pools), ch_interval, sc_interval, processes, placement,
+                              workers, event_driven, eager_coalescing, compaction, policy) as sim:
+        metrics = sim.run(max_time)
+
+    return {
+        "workload": workload,
+        "policy": policy,
+        "total_memory": total_memory,
+        "ch_interval": ch_interval,
+        "sc_interval": sc_interval,
+        "compaction": compaction,
+        "processes": metrics["num_processes"],
+        "completed": metrics["completed"],
+        "rejected": metrics["rejected"],
+        "makespan": metrics["time"],
+        "average_wait": metrics["average_wait"],
+        "peak_fragmentation": metrics["peak_fragmentation"],
+        "bytes_moved": metrics["bytes_moved"],
+        "blocks_moved": metrics["blocks_moved"],
+        "pools": pools,
+        "placement": sim.placement.name,
+    }
+
+#Helper function that unpacks a sweep configuration inside a pool worker
+def _run_config(config):
+    return run_simulation(**config)
+
+#Function that runs every combination of the given parameters across a multiprocessing pool
+#Results come back in the same order as the combinations, whatever order the workers finish in
+#With a ResultCache, combinations that ran before are taken from the cache; see run_simulation
+def run_sweep(memory_sizes, ch_intervals, sc_intervals, workload_paths, jobs=None, event_driven=True, max_time=None,
+              eager_coalescing=False, compactions=("full",), policies=("first_fit",), cache=None):
+    workloads = {path: load_workload(path) for path in workload_paths}
+    #Each workload is hashed once here instead of once per combination
+    digests = {path: workload_digest(workloads[path]) if cache is not None else None for path in workload_paths}
+    configs = [
+        {
+            "total_memory": mem, "ch_interval": ch, "sc_interval": sc,
+            "processes": workloads[path], "workload": os.path.basename(path),
+            "event_driven": event_driven, "max_time": max_time, "eager_coalescing": eager_coalescing,
+            "compaction": compaction, "policy": policy, "cache": cache, "digest": digests[path],
+        }
+        for path, policy, mem, ch, sc, compaction in itertools.product(
+            workload_paths, policies, memory_sizes, ch_intervals, sc_intervals, compactions
+        )
+    ]
+
+    if jobs == 1 or len(configs) <= 1:
+        return [_run_config(config) for config in configs]
+    with Pool(processes=jobs) as pool:
+        return pool.map(_run_config, configs, chunksize=max(1, len(configs) // (4 * (jobs or os.cpu_count() or 1))))
+
+#Function that runs the same sweep with the NumPy engine, one batch of replicas per workload
+#NumPy is only imported here, so the rest of the runner works without it
+def run_vectorized_sweep(memory_sizes, ch_intervals, sc_intervals, workload_paths, max_time=None):
+    from vector_engine import VectorizedSimulator
+
+    results = []
+    for path in workload_paths:
+        processes = load_workload(path)
+        if any(p['arrival'] for p in processes):
+            raise ValueError(f"{path}: the vectorized engine does not support arrival times.")
+        combos = list(itertools.product(memory_sizes, ch_intervals, sc_intervals))
+        engine = VectorizedSimulator(
+            [mem for mem, _, _ in combos], [ch for _, ch, _ in combos], [sc for _, _, sc in combos], processes
+        )
+        results.extend(engine.run(max_time).summary(os.path.basename(path)))
+    return results
+
+#Function that returns the memory blocks of a recorded run at the given time, as rows like write_results takes
+def replay_blocks(trace_path, time):
+    sim = Replay(trace_path).seek(time)
+    return [dict(zip(BLOCK_FIELDS, (b.start, b.end, b.size, b.is_free, b.pid))) for b in sim.memory_blocks]
+
+#Function that writes result rows as CSV or JSON
+def write_results(results, fmt, out, fields=RESULT_FIELDS):
+    if fmt == "json":
+        json.dump(results, out, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+#Helper function that builds the command line interface of the headless runner
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run memory allocation simulations without a GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("--format", choices=["csv", "json"], default="csv", help="output format (default: csv)")
+        sub.add_argument("-o", "--output", help="file to write results to (default: standard output)")
+        sub.add_argument("--tick", action="store_true", help="advance one tick per step instead of jumping between events")
+        sub.add_argument("--max-time", type=int, help="stop a run once its timeline reaches this value")
+        sub.add_argument("--eager", action="store_true", help="merge freed blocks with free neighbors immediately")
+        sub.add_argument("--cache-dir", help="directory of the result cache (default: $MSIM_CACHE_DIR or "
+                                             "~/.cache/memory-simulator)")
+        sub.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 2 ** 20,
+                         help=f"size limit of the result cache in MB (default: {DEFAULT_MAX_BYTES // 2 ** 20})")
+        sub.add_argument("--no-cache", action="store_true",
+                         help="always run the simulations, without reading or storing cached results")
+
+    run_parser = subparsers.add_parser("run", help="run a single simulation")
+    run_parser.add_argument("workload", help="workload file (.json, .jsonl or .csv) with size, burst and optional "
+                                             "arrival per process; .jsonl and .csv files are streamed")
+    run_parser.add_argument("--memory", type=int, default=1000, help="total memory size (default: 1000)")
+    run_parser.add_argument("--ch", type=int, default=0, help="coalescing interval, 0 disables it (default: 0)")
+    run_parser.add_argument("--sc", type=int, default=0, help="compaction interval, 0 disables it (default: 0)")
+    run_parser.add_argument("--compaction", choices=list(COMPACTION_STRATEGIES), default="full",
+                            help="compaction strategy (default: full)")
+    run_parser.add_argument("--policy", choices=list(ALLOCATION_POLICIES), default="first_fit",
+                            help="allocation policy (default: first_fit)")
+    run_parser.add_argument("--log", choices=list(LEVELS), default="off",
+                            help="print the simulation log at this level to standard error (default: off)")
+    run_parser.add_argument("--trace", help="record a binary trace of the run to this file")
+    run_parser.add_argument("--checkpoint-interval", type=int, default=1000,
+                            help="ticks between two checkpoints of the trace (default: 1000)")
+    run_parser.add_argument("--pools", type=int, default=1,
+                            help="split memory into this many independent pools of equal size (default: 1)")
+    run_parser.add_argument("--placement", choices=list(PLACEMENT_POLICIES), default="round_robin",
+                            help="how processes are routed to pools (default: round_robin)")
+    run_parser.add_argument("--pool-workers", type=int,
+                            help="worker processes that run the pools in parallel (default: run them in this process)")
+    add_common(run_parser)
+
+    sweep_parser = subparsers.add_parser("sweep", help="run every combination of the given parameters")
+    sweep_parser.add_argument("--workload", nargs="+", required=True, help="workload files to sweep over")
+    sweep_parser.add_argument("--memory", type=int, nargs="+", default=[1000], help="total memory sizes")
+    sweep_parser.add_argument("--ch", type=int, nargs="+", default=[0], help="coalescing intervals")
+    sweep_parser.add_argument("--sc", type=int, nargs="+", default=[0], help="compaction intervals")
+    sweep_parser.add_argument("--compaction", choices=list(COMPACTION_STRATEGIES), nargs="+", default=["full"],
+                              help="compaction strategies")
+    sweep_parser.add_argument("--policy", choices=list(ALLOCATION_POLICIES), nargs="+", default=["first_fit"],
+                              help="allocation policies")
+    sweep_parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per CPU)")
+    sweep_parser.add_argument("--vectorized", action="store_true",
+                              help="run all settings of a workload in lockstep with the NumPy engine (tick mode)")
+    add_common(sweep_parser)
+
+    replay_parser = subparsers.add_parser("replay", help="print the memory blocks of a recorded run at a given time")
+    replay_parser.add_argument("trace", help="trace file written by run --trace")
+    replay_parser.add_argument("--time", type=int, required=True, help="time to jump to")
+    replay_parser.add_argument("--format", choices=["csv", "json"], default="csv", help="output format (default: csv)")
+    replay_parser.add_argument("-o", "--output", help="file to write the blocks to (default: standard output)")
+
+    return parser
+
+#Function that validates the arguments shared by both commands
+def _check_settings(parser, memory_sizes, ch_intervals, sc_intervals):
+    if any(mem <= 0 for mem in memory_sizes) or any(i < 0 for i in ch_intervals + sc_intervals):
+        parser.error("Settings must be valid numbers (Memory > 0, Intervals >= 0).")
+
+#Helper function that returns the result cache selected by the arguments, or None when it is turned off
+def _open_cache(parser, args):
+    if args.no_cache:
+        return None
+    if args.cache_size <= 0:
+        parser.error("The cache size must be > 0.")
+    return ResultCache(args.cache_dir, args.cache_size * 2 ** 20)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    fields = RESULT_FIELDS
+
+    if args.command == "replay":
+        if args.time < 0:
+            parser.error("Time must be >= 0.")
+        results = replay_blocks(args.trace, args.time)
+        fields = BLOCK_FIELDS
+    elif args.command == "run":
+        _check_settings(parser, [args.memory], [args.ch], [args.sc])
+        if args.checkpoint_interval <= 0:
+            parser.error("The checkpoint interval must be > 0.")
+        if args.pools <= 0 or args.pools > args.memory or (args.pool_workers is not None and args.pool_workers <= 0):
+            parser.error("Pools must be between 1 and the memory size, and pool workers > 0.")
+        if args.pools > 1:
+            if args.trace or args.log != "off":
+                parser.error("Runs with several pools cannot record a trace or print a log.")
+            results = [run_partitioned(args.memory, args.ch, args.sc, args.workload, args.pools, args.placement,
+                                       args.pool_workers, os.path.basename(args.workload), not args.tick,
+                                       args.max_time, args.eager, args.compaction, args.policy)]
+            fields = PARTITIONED_FIELDS
+        else:
+            cache = _open_cache(parser, args)
+            #The trace file is opened for reading too, so a new trace can be stored in the cache
+            trace_file = open(args.trace, "w+b") if args.trace else None
+            try:
+                trace = TraceRecorder(trace_file, args.checkpoint_interval) if trace_file else None
+                results = [run_simulation(args.memory, args.ch, args.sc, args.workload,
+                                          os.path.basename(args.workload), not args.tick, args.max_time, args.eager,
+                                          args.compaction, args.policy, lambda line: print(line, file=sys.stderr),
+                                          LEVELS[args.log], trace, cache)]
+            finally:
+                if trace_file:
+                    trace_file.close()
+    else:
+        _check_settings(parser, args.memory, args.ch, args.sc)
+        if args.vectorized:
+            if args.eager or args.compaction != ["full"] or args.policy != ["first_fit"]:
+                parser.error("The vectorized engine only supports first-fit, interval coalescing and full compaction.")
+            try:
+                results = run_vectorized_sweep(args.memory, args.ch, args.sc, args.workload, args.max_time)
+            except ValueError as e:
+                parser.error(str(e))
+        else:
+            results = run_sweep(args.memory, args.ch, args.sc, args.workload, args.jobs, not args.tick, args.max_time,
+                                args.eager, args.compaction, args.policy, _open_cache(parser, args))
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_results(results, args.format, out, fields)
+    else:
+        write_results(results, args.format, sys.stdout, fields)
+
+if __name__ == "__main__":
+    main()
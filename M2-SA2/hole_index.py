@@ -0,0 +1,155 @@
+import random
+
+#Defines a node of the hole index, keyed by the start address of a free MemoryBlock
+class _HoleNode:
+    __slots__ = ("block", "start", "priority", "left", "right", "max_size")
+
+    def __init__(self, block, priority):
+        self.block = block
+        self.start = block.start
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.max_size = block.size
+
+#Address-ordered index of the free holes in memory
+#Implemented as a treap where every node also stores the size of the largest hole in its subtree,
+#which lets first-fit skip whole subtrees that cannot satisfy a request
+class HoleIndex:
+    #Defines the constructor of the hole index
+    def __init__(self, blocks=()):
+        self._root = None
+        self._count = 0
+        self._rng = random.Random(0)
+        #Number of nodes the searches have looked at so far, for the profiling counters
+        self.scanned = 0
+        for block in blocks:
+            if block.is_free:
+                self.insert(block)
+
+    def __len__(self):
+        return self._count
+
+    #Returns the size of the largest hole, or 0 when memory is completely allocated
+    def largest(self):
+        return self._root.max_size if self._root else 0
+
+    #Helper method that recomputes the largest hole of a subtree after its children have changed
+    @staticmethod
+    def _update(node):
+        best = node.block.size
+        if node.left and node.left.max_size > best:
+            best = node.left.max_size
+        if node.right and node.right.max_size > best:
+            best = node.right.max_size
+        node.max_size = best
+
+    #Helper method that splits a subtree into the holes starting before the address and the rest
+    def _split(self, node, start):
+        if node is None:
+            return None, None
+        if node.start < start:
+            node.right, right = self._split(node.right, start)
+            self._update(node)
+            return node, right
+        left, node.left = self._split(node.left, start)
+        self._update(node)
+        return left, node
+
+    #Helper method that joins two subtrees where every hole of the left one comes first in memory
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            self._update(left)
+            return left
+        right.left = self._merge(left, right.left)
+        self._update(right)
+        return right
+
+    #Adds a free block to the index
+    def insert(self, block):
+        node = _HoleNode(block, self._rng.random())
+        left, right = self._split(self._root, block.start)
+        self._root = self._merge(self._merge(left, node), right)
+        self._count += 1
+
+    #Removes the hole that starts at the address of the given block from the index
+    def remove(self, block):
+        left, rest = self._split(self._root, block.start)
+        node, right = self._split(rest, block.start + 1)
+        if node is not None:
+            self._count -= 1
+        self._root = self._merge(left, right)
+
+    #Re-indexes a hole whose size has changed while it stayed at the same start address
+    def resize(self, block):
+        path = []
+        node = self._root
+        while node is not None and node.start != block.start:
+            path.append(node)
+            node = node.left if block.start < node.start else node.right
+        if node is None:
+            return
+        self._update(node)
+        for parent in reversed(path):
+            self._update(parent)
+
+    #Returns the lowest-addressed hole that can hold the given size, or None if no hole is large enough
+    def first_fit(self, size):
+        node = self._root
+        if node is None or node.max_size < size:
+            self.scanned += 1
+            return None
+        visited = 0
+        while node is not None:
+            visited += 1
+            if node.left and node.left.max_size >= size:
+                node = node.left
+            elif node.block.size >= size:
+                break
+            else:
+                node = node.right
+        self.scanned += visited
+        return node.block if node is not None else None
+
+    #Returns the hole that contains the given address, or None when the address is not free
+    def hole_at(self, address):
+        node = self._root
+        found = None
+        while node is not None:
+            self.scanned += 1
+            if node.start <= address:
+                found = node
+                node = node.right
+            else:
+                node = node.left
+        if found is not None and found.block.end >= address:
+            return found.block
+        return None
+
+    #Returns the lowest-addressed hole starting at or after the given address that can hold the given size
+    def first_fit_from(self, start, size):
+        return self._first_fit_from(self._root, start, size)
+
+    #Helper method that searches a subtree for first_fit_from, skipping subtrees without a large enough hole
+    def _first_fit_from(self, node, start, size):
+        self.scanned += 1
+        if node is None or node.max_size < size:
+            return None
+        if node.start < start:
+            return self._first_fit_from(node.right, start, size)
+        found = self._first_fit_from(node.left, start, size)
+        if found is not None:
+            return found
+        if node.block.size >= size:
+            return node.block
+        return self._first_fit_from(node.right, start, size)
+
+    #Removes every hole from the index
+    def clear(self):
+        self._root = None
+        self._count = 0
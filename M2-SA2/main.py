@@ -1,7 +1,16 @@
+import queue
 import tkinter as tk
+from tkinter import filedialog
 from tkinter import messagebox
+from tkinter import font as tkfont
 from tkinter import ttk
 from simulator import MemorySimulator
+from worker import SimulationWorker, SimulationSnapshot
+from events import RingBufferSink
+from recording import TraceRecorder, Replay
+from allocation import ALLOCATION_POLICIES
+from workload import read_workload, generate_workload
+from result_cache import ResultCache, workload_digest
 
 #The global function that makes the application display at the center by default
 def center_window(window):
@@ -14,16 +23,21 @@ def center_window(window):
     y = (screen_height // 2) - (height // 2)
     window.geometry(f'{width}x{height}+{x}+{y}')
 
-#GUI that acquires the input of the parameters of the First-Fit Memory Allocation Simulation
+#GUI that acquires the input of the parameters of the Memory Allocation Simulation
 #First window the user sees when executing the program
 class InputForm(tk.Tk):
     #Defines the constructor of the setup window of the program
     def __init__(self):
         super().__init__()
-        self.title("First Fit Simulation Setup")
+        self.title("Memory Allocation Simulation Setup")
         self.geometry("650x500")
         
         self.process_data = [] 
+        #Index of the first process shown in the process queue and the number of rows that fit in it
+        self.tree_offset = 0
+        self.tree_rows = 1
+        #Finished runs are stored here, so starting the same simulation again shows its result right away
+        self.result_cache = ResultCache()
         
         main_frame = ttk.Frame(self, padding="10")
         main_frame.pack(fill="both", expand=True)
@@ -49,6 +63,11 @@ class InputForm(tk.Tk):
         self.sc_entry = ttk.Entry(settings_frame, width=10)
         self.sc_entry.grid(row=2, column=1, padx=5, pady=5)
         self.sc_entry.insert(0, "0")
+        ttk.Label(settings_frame, text="Allocation Policy:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        self.policy_names = {policy.label: name for name, policy in ALLOCATION_POLICIES.items()}
+        self.policy_combo = ttk.Combobox(settings_frame, values=list(self.policy_names), state="readonly", width=12)
+        self.policy_combo.grid(row=3, column=1, padx=5, pady=5)
+        self.policy_combo.set(ALLOCATION_POLICIES["first_fit"].label)
 
         process_frame = ttk.LabelFrame(top_container, text="Add Processes")
         process_frame.grid(row=0, column=1, padx=10, pady=5, sticky="nsew")
@@ -59,10 +78,14 @@ class InputForm(tk.Tk):
         ttk.Label(process_frame, text="Burst Time:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
         self.burst_entry = ttk.Entry(process_frame, width=10)
         self.burst_entry.grid(row=1, column=1, padx=5, pady=5)
+        ttk.Label(process_frame, text="Arrival Time:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        self.arrival_entry = ttk.Entry(process_frame, width=10)
+        self.arrival_entry.grid(row=2, column=1, padx=5, pady=5)
+        self.arrival_entry.insert(0, "0")
 
         p_button_frame = ttk.Frame(process_frame)
-        p_button_frame.grid(row=2, column=0, columnspan=2, pady=10)
-        process_frame.grid_rowconfigure(2, weight=1)
+        p_button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+        process_frame.grid_rowconfigure(3, weight=1)
         process_frame.grid_columnconfigure(0, weight=1)
         p_button_frame.grid_columnconfigure(0, weight=1)
         p_button_frame.grid_columnconfigure(1, weight=1)
@@ -74,14 +97,23 @@ class InputForm(tk.Tk):
         self.clear_button = ttk.Button(p_button_frame, text="Clear All Processes", command=self.clear_processes)
         self.clear_button.grid(row=0, column=1, padx=5, sticky="ew")
 
-        list_frame = ttk.LabelFrame(main_frame, text="Process Queue (Double-click to Edit/Delete)")
-        list_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.import_button = ttk.Button(p_button_frame, text="Import File...", command=self.import_processes)
+        self.import_button.grid(row=1, column=0, padx=5, pady=(5, 0), sticky="ew")
+
+        self.generate_button = ttk.Button(p_button_frame, text="Generate...", command=self.open_generate_window)
+        self.generate_button.grid(row=1, column=1, padx=5, pady=(5, 0), sticky="ew")
+
+        self.list_frame = ttk.LabelFrame(main_frame, text="Process Queue (Double-click to Edit/Delete)")
+        self.list_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        list_frame = self.list_frame
         
         list_frame.rowconfigure(0, weight=1)
         list_frame.columnconfigure(0, weight=1)
 
-        cols = ('pid', 'size', 'burst')
-        self.process_tree = ttk.Treeview(list_frame, columns=cols, show='headings', height=5)
+        #The Treeview only holds the rows that fit in it; scrolling shows other processes in the same rows
+        #so that queues of any length load and scroll at the same speed
+        cols = ('pid', 'size', 'burst', 'arrival')
+        self.process_tree = ttk.Treeview(list_frame, columns=cols, show='headings', height=5, selectmode='browse')
         
         self.process_tree.heading('pid', text='PID')
         self.process_tree.column('pid', anchor='center', width=50, stretch=False)
@@ -89,26 +121,96 @@ class InputForm(tk.Tk):
         self.process_tree.column('size', anchor='center', width=150)
         self.process_tree.heading('burst', text='Burst Time')
         self.process_tree.column('burst', anchor='center', width=150)
+        self.process_tree.heading('arrival', text='Arrival Time')
+        self.process_tree.column('arrival', anchor='center', width=150)
         
-        tree_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.process_tree.yview)
-        self.process_tree.configure(yscrollcommand=tree_scroll.set)
+        self.tree_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.scroll_process_tree)
         
         self.process_tree.grid(row=0, column=0, sticky='nsew')
-        tree_scroll.grid(row=0, column=1, sticky='ns')
+        self.tree_scroll.grid(row=0, column=1, sticky='ns')
         
         self.process_tree.bind("<Double-Button-1>", self.on_process_double_click)
+        self.process_tree.bind("<Configure>", self.fit_process_tree)
+        self.process_tree.bind("<MouseWheel>", self.on_process_tree_wheel)
+        self.process_tree.bind("<Button-4>", self.on_process_tree_wheel)
+        self.process_tree.bind("<Button-5>", self.on_process_tree_wheel)
 
         self.start_button = ttk.Button(main_frame, text="Start Simulation", command=self.start_simulation)
         self.start_button.pack(pady=10)
 
         center_window(self)
 
-    #Helper method that deletes all items currently in the Treeview and re-adds them to the process list
+    #Helper method that shows the processes from tree_offset on in the rows of the Treeview
+    #Rows are reused and only as many exist as fit in the Treeview, so a refresh costs the same for any queue length
     def refresh_process_tree(self):
-        self.process_tree.delete(*self.process_tree.get_children())
-        for i, p in enumerate(self.process_data):
-            pid = i + 1
-            self.process_tree.insert("", "end", values=(pid, p['size'], p['burst']))
+        total = len(self.process_data)
+        self.tree_offset = max(0, min(self.tree_offset, total - self.tree_rows))
+        items = self.process_tree.get_children()
+        count = min(self.tree_rows, total - self.tree_offset)
+        if len(items) > count:
+            self.process_tree.delete(*items[count:])
+        for i in range(count):
+            index = self.tree_offset + i
+            p = self.process_data[index]
+            values = (index + 1, p['size'], p['burst'], p.get('arrival', 0))
+            if i < len(items):
+                self.process_tree.item(items[i], values=values)
+            else:
+                self.process_tree.insert("", "end", values=values)
+        if total:
+            self.tree_scroll.set(self.tree_offset / total, (self.tree_offset + count) / total)
+        else:
+            self.tree_scroll.set(0, 1)
+        self.list_frame.configure(text=f"Process Queue: {total} Processes (Double-click to Edit/Delete)")
+        #Rows can only be measured once they exist, so the first rows trigger another fit
+        if count and not items:
+            self.after_idle(self.fit_process_tree)
+
+    #Helper method that scrolls the process queue so that the process at index is its first row
+    def set_tree_offset(self, index):
+        index = max(0, min(index, len(self.process_data) - self.tree_rows))
+        if index != self.tree_offset:
+            self.tree_offset = index
+            #The selection belongs to a row, which now shows another process
+            self.process_tree.selection_remove(self.process_tree.selection())
+            self.refresh_process_tree()
+
+    #Helper method that scrolls the process queue so that the process at index is visible
+    def show_process(self, index):
+        if index < self.tree_offset:
+            self.set_tree_offset(index)
+        elif index >= self.tree_offset + self.tree_rows:
+            self.set_tree_offset(index - self.tree_rows + 1)
+        else:
+            self.refresh_process_tree()
+
+    #Called by the scrollbar of the process queue with the arguments of a Tk yview command
+    def scroll_process_tree(self, *args):
+        if args[0] == "moveto":
+            self.set_tree_offset(int(float(args[1]) * len(self.process_data)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.tree_rows if args[2] == "pages" else 1)
+            self.set_tree_offset(self.tree_offset + step)
+
+    #Scrolls the process queue by three rows per step of the mouse wheel
+    def on_process_tree_wheel(self, event):
+        up = event.num == 4 or event.delta > 0
+        self.set_tree_offset(self.tree_offset + (-3 if up else 3))
+        return "break"
+
+    #Helper method that sets the number of rows to the number that fits in the height of the Treeview
+    def fit_process_tree(self, event=None):
+        items = self.process_tree.get_children()
+        bbox = self.process_tree.bbox(items[0]) if items else ""
+        if bbox:
+            header, row_height = bbox[1], bbox[3]
+        else:
+            row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") + 4
+            header = row_height + 4
+        rows = max(1, (self.process_tree.winfo_height() - header) // row_height)
+        if rows != self.tree_rows:
+            self.tree_rows = rows
+            self.refresh_process_tree()
 
     #Opens a window for editing or deleting a process when double clicking a row
     def on_process_double_click(self, event):
@@ -155,9 +257,14 @@ class InputForm(tk.Tk):
         self.edit_burst_entry = ttk.Entry(frame, width=10)
         self.edit_burst_entry.grid(row=1, column=1, padx=5, pady=5)
         self.edit_burst_entry.insert(0, str(process['burst']))
+
+        ttk.Label(frame, text="Arrival Time:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        self.edit_arrival_entry = ttk.Entry(frame, width=10)
+        self.edit_arrival_entry.grid(row=2, column=1, padx=5, pady=5)
+        self.edit_arrival_entry.insert(0, str(process.get('arrival', 0)))
         
         btn_frame = ttk.Frame(frame)
-        btn_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        btn_frame.grid(row=3, column=0, columnspan=2, pady=10)
         
         save_btn = ttk.Button(btn_frame, text="Save Changes", command=lambda: self.save_edit(index))
         save_btn.pack(side="left", padx=5)
@@ -175,10 +282,11 @@ class InputForm(tk.Tk):
         try:
             new_size = int(self.edit_size_entry.get())
             new_burst = int(self.edit_burst_entry.get())
-            if new_size <= 0 or new_burst <= 0:
+            new_arrival = int(self.edit_arrival_entry.get())
+            if new_size <= 0 or new_burst <= 0 or new_arrival < 0:
                 raise ValueError("Values must be positive.")
             
-            self.process_data[index] = {'size': new_size, 'burst': new_burst}
+            self.process_data[index] = {'size': new_size, 'burst': new_burst, 'arrival': new_arrival}
             self.refresh_process_tree()
             self.edit_win.destroy()
             
@@ -196,6 +304,7 @@ class InputForm(tk.Tk):
     def clear_processes(self):
         if messagebox.askyesno("Confirm Clear", "Are you sure you want to clear all processes?"):
             self.process_data.clear()
+            self.tree_offset = 0
             self.refresh_process_tree()
 
     #Function that adds the input process of the user
@@ -203,18 +312,100 @@ class InputForm(tk.Tk):
         try:
             size = int(self.size_entry.get())
             burst = int(self.burst_entry.get())
-            if size <= 0 or burst <= 0: raise ValueError
+            arrival = int(self.arrival_entry.get() or 0)
+            if size <= 0 or burst <= 0 or arrival < 0: raise ValueError
             
-            self.process_data.append({'size': size, 'burst': burst})
-            self.refresh_process_tree()
+            self.process_data.append({'size': size, 'burst': burst, 'arrival': arrival})
+            self.show_process(len(self.process_data) - 1)
             
             self.size_entry.delete(0, tk.END)
             self.burst_entry.delete(0, tk.END)
             self.size_entry.focus()
         except ValueError:
-            messagebox.showerror("Invalid Input", "Please enter valid positive numbers for Size and Burst Time.")
+            messagebox.showerror("Invalid Input", "Please enter valid positive numbers for Size and Burst Time, and an Arrival Time >= 0.")
+
+    #Function that adds every process of a CSV, JSON or JSONL workload file to the queue
+    def import_processes(self):
+        path = filedialog.askopenfilename(parent=self, title="Import Processes", filetypes=[
+            ("Workload files", "*.csv *.json *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            processes = list(read_workload(path))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import Failed", str(e))
+            return
+        self.add_processes(processes)
+
+    #Helper method that adds a list of processes to the end of the queue and shows the first of them
+    def add_processes(self, processes):
+        first = len(self.process_data)
+        self.process_data.extend(processes)
+        self.set_tree_offset(first)
+        self.refresh_process_tree()
+
+    #Helper method that puts the queue in arrival order, which the simulator needs, keeping the order of processes
+    #that arrive at the same time. Returns whether any process moved, so the PIDs shown in the queue changed
+    def sort_processes_by_arrival(self):
+        arrivals = [p.get('arrival', 0) for p in self.process_data]
+        if all(a <= b for a, b in zip(arrivals, arrivals[1:])):
+            return False
+        self.process_data.sort(key=lambda p: p.get('arrival', 0))
+        self.refresh_process_tree()
+        return True
+
+    #Creates the window that generates a random workload from a seed
+    def open_generate_window(self):
+        self.generate_win = tk.Toplevel(self)
+        self.generate_win.title("Generate Processes")
+        self.generate_win.transient(self)
+
+        frame = ttk.Frame(self.generate_win, padding="10")
+        frame.pack(fill="both", expand=True)
+
+        #(label, default value) of every setting, stored in self.generate_entries by the same key
+        fields = {
+            'count': ("Number of Processes:", "1000"),
+            'seed': ("Seed:", "0"),
+            'size_min': ("Minimum Size:", "1"),
+            'size_max': ("Maximum Size:", "100"),
+            'burst_min': ("Minimum Burst Time:", "1"),
+            'burst_max': ("Maximum Burst Time:", "10"),
+            'per_tick': ("Arrivals per Tick (0 = all at once):", "0"),
+        }
+        self.generate_entries = {}
+        for row, (key, (label, default)) in enumerate(fields.items()):
+            ttk.Label(frame, text=label).grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            entry = ttk.Entry(frame, width=10)
+            entry.grid(row=row, column=1, padx=5, pady=5)
+            entry.insert(0, default)
+            self.generate_entries[key] = entry
+
+        generate_btn = ttk.Button(frame, text="Generate", command=self.generate_processes)
+        generate_btn.grid(row=len(fields), column=0, columnspan=2, pady=10)
+
+        center_window(self.generate_win)
+        self.generate_win.grab_set()
+
+        self.wait_window(self.generate_win)
+
+    #Function that adds the processes of the generate window to the queue
+    def generate_processes(self):
+        try:
+            values = {key: int(entry.get()) for key, entry in self.generate_entries.items()}
+            if values['count'] <= 0 or values['per_tick'] < 0:
+                raise ValueError("The number of processes must be > 0 and arrivals per tick >= 0.")
+            processes = list(generate_workload(values['count'], values['seed'],
+                                               (values['size_min'], values['size_max']),
+                                               (values['burst_min'], values['burst_max']),
+                                               values['per_tick'] or None))
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", f"Please enter valid numbers.\n({e})", parent=self.generate_win)
+            return
+        self.add_processes(processes)
+        self.generate_win.destroy()
 
-    #Function that starts the simulation of the First-fit memory allocation algorithm
+    #Function that starts the simulation of the selected memory allocation algorithm
     def start_simulation(self):
         try:
             total_mem = int(self.mem_entry.get())
@@ -224,15 +415,27 @@ class InputForm(tk.Tk):
                 raise ValueError("Settings must be valid numbers (Memory > 0, Intervals >= 0).")
             if not self.process_data:
                 raise ValueError("Please add at least one process.")
+            if self.sort_processes_by_arrival():
+                messagebox.showinfo("Queue Sorted", "The processes were sorted by arrival time and renumbered, "
+                                    "since a process can only be listed after the ones arriving before it.")
+
+            policy = self.policy_names[self.policy_combo.get()]
+            settings = {"total_memory": total_mem, "ch_interval": ch, "sc_interval": sc, "policy": policy}
+            cache_key = self.result_cache.key("gui", settings, workload_digest(self.process_data))
+            result = self.result_cache.get(cache_key)
+            cached_trace = self.result_cache.get_trace(cache_key) if result is not None else None
 
             self.withdraw() 
             
             app = VisualApp(self)
             
-            sim_process_data = list(self.process_data)
-            sim = MemorySimulator(total_mem, ch, sc, sim_process_data, app.log_message)
-            
-            app.run_simulation(sim)
+            if cached_trace is not None:
+                app.show_cached_run(result, cached_trace)
+            else:
+                sim_process_data = list(self.process_data)
+                sim = MemorySimulator(total_mem, ch, sc, sim_process_data, app.log_sink, policy=policy,
+                                      trace=app.trace_recorder, metrics=True)
+                app.run_simulation(sim, self.result_cache, cache_key)
             
             app.mainloop()
 
@@ -240,13 +443,35 @@ class InputForm(tk.Tk):
             messagebox.showerror("Error", str(e))
             self.deiconify() 
 
-#GUI that shows a visualization of the First-Fit Memory Allocation Simulation
+#Milliseconds between two frames of the visualization
+FRAME_INTERVAL = 33
+#Number of log lines kept in the Simulation Log; older lines are dropped
+LOG_CAPACITY = 2000
+#Ticks between two checkpoints of the recorded trace, which bounds how many ticks a jump has to simulate again
+CHECKPOINT_INTERVAL = 500
+
+#GUI that shows a visualization of the Memory Allocation Simulation
+#The simulation runs in a SimulationWorker thread; the window redraws from its snapshots once per frame
 class VisualApp(tk.Tk):
     #Defines the constructor of the window that visualizes the simulation
     def __init__(self, input_form):
         super().__init__()
         self.simulation = None 
+        self.worker = None
+        self.snapshot = None
+        #Canvas items of the memory map, keyed by the bar they draw, so a frame only redraws bars that changed
+        self.map_items = {}
+        self.map_size = None
         self.input_form = input_form
+        self.log_sink = RingBufferSink(LOG_CAPACITY)
+        self.logs_dropped = 0
+        self.trace_recorder = TraceRecorder(checkpoint_interval=CHECKPOINT_INTERVAL)
+        #Where the result of the run is stored once it finishes, and the trace of a run shown from the cache
+        self.result_cache = None
+        self.cache_key = None
+        self.cached_trace = None
+        #Index of the trace that jumps seek in, built once and grown with the ticks recorded since the last jump
+        self.replay = None
 
         self.title("First Fit Memory Visualizer")
         self.geometry("1000x500") 
@@ -262,12 +487,39 @@ class VisualApp(tk.Tk):
         self.status_label = tk.Label(top_frame, textvariable=self.status_label_var, font=("Arial", 12))
         self.status_label.pack(pady=2)
 
+        self.metrics_label_var = tk.StringVar()
+        self.metrics_label = tk.Label(top_frame, textvariable=self.metrics_label_var, font=("Arial", 10), justify="left")
+        self.metrics_label.pack(pady=2)
+
+        controls_frame = ttk.Frame(top_frame)
+        controls_frame.pack(pady=2)
+        self.pause_button = ttk.Button(controls_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.pack(side="left", padx=5)
+        self.step_button = ttk.Button(controls_frame, text="Step", command=self.single_step, state="disabled")
+        self.step_button.pack(side="left", padx=5)
+        self.run_to_end_button = ttk.Button(controls_frame, text="Run to End", command=self.run_to_end)
+        self.run_to_end_button.pack(side="left", padx=5)
+        ttk.Label(controls_frame, text="Speed:").pack(side="left", padx=(15, 5))
+        #The speed scale is logarithmic, from 1 to 1000 ticks per second
+        self.speed_var = tk.DoubleVar(value=0)
+        ttk.Scale(controls_frame, from_=0, to=3, variable=self.speed_var, length=150,
+                  command=self.change_speed).pack(side="left")
+        self.speed_label_var = tk.StringVar(value="1 tick/s")
+        ttk.Label(controls_frame, textvariable=self.speed_label_var, width=14).pack(side="left", padx=5)
+        ttk.Label(controls_frame, text="Go to time:").pack(side="left", padx=(15, 5))
+        self.seek_entry = ttk.Entry(controls_frame, width=8)
+        self.seek_entry.pack(side="left")
+        self.seek_button = ttk.Button(controls_frame, text="Go", command=self.seek_to_time)
+        self.seek_button.pack(side="left", padx=5)
+
         self.new_sim_button = ttk.Button(top_frame, text="Run New Simulation", command=self.run_new_simulation)
         self.new_sim_button.pack(pady=5)
         self.new_sim_button.pack_forget() 
         
         self.canvas = tk.Canvas(top_frame, bg="white", height=150) 
         self.canvas.pack(fill="x", expand=False, padx=10, pady=5) 
+        #The map is drawn again once the canvas gets its size, so a snapshot shown before that is not left blank
+        self.canvas.bind("<Configure>", lambda event: self.draw_memory())
 
         log_frame = ttk.LabelFrame(self, text="Simulation Log")
         log_frame.pack(fill="both", expand=True, padx=10, pady=(5,10))
@@ -286,28 +538,126 @@ class VisualApp(tk.Tk):
 
     #Function that defines the functionality of being able to run a new simulation after a finished simulation
     def run_new_simulation(self):
+        self.stop_worker()
         self.destroy()
         self.input_form.deiconify()
         center_window(self.input_form) 
 
     #Function that closes the current window and opens up the setup window.
     def on_close(self):
+        self.stop_worker()
         self.destroy()
         self.input_form.deiconify()
         center_window(self.input_form)
 
     #Function that stores the simulation object and starts the visualization of the current simulation
-    def run_simulation(self, simulation):
+    #When the run finishes, its metrics and trace are stored in result_cache under cache_key
+    def run_simulation(self, simulation, result_cache=None, cache_key=None):
         self.simulation = simulation
-        self.after(500, self.update_simulation) 
+        self.result_cache = result_cache
+        self.cache_key = cache_key
+        self.title(f"{simulation.policy.label} Memory Visualizer")
+        self.worker = SimulationWorker(simulation, ticks_per_second=self._ticks_per_second())
+        self.after(500, self.worker.start)
+        self.after(FRAME_INTERVAL, self.update_simulation)
+
+    #Function that shows the end of a run taken from the result cache instead of running the simulation again
+    #The trace of the run is kept, so the user can still go to any time of it
+    def show_cached_run(self, result, trace):
+        self.cached_trace = trace
+        self.replay = Replay(trace)
+        self.simulation = self.replay.seek(self.replay.end_time)
+        self.title(f"{self.simulation.policy.label} Memory Visualizer")
+        snapshot = SimulationSnapshot(self.simulation, True)
+        snapshot.metrics = result["metrics"]
+        self.log_message("###### Same simulation as an earlier run, result taken from the cache ######")
+        self.after(FRAME_INTERVAL, lambda: self._show_complete(snapshot))
+
+    #Function that stops the worker thread of the current simulation
+    def stop_worker(self):
+        if self.worker:
+            self.worker.stop()
+
+    #Helper function that converts the position of the speed scale to ticks per second
+    def _ticks_per_second(self):
+        return 10 ** self.speed_var.get()
+
+    #Function that applies a new position of the speed scale
+    def change_speed(self, value=None):
+        ticks_per_second = self._ticks_per_second()
+        self.speed_label_var.set(f"{ticks_per_second:.0f} ticks/s" if ticks_per_second >= 1.5 else "1 tick/s")
+        if self.worker:
+            self.worker.set_speed(ticks_per_second)
+
+    #Function that pauses or resumes the simulation
+    def toggle_pause(self):
+        if not self.worker:
+            return
+        paused = not self.worker.paused
+        self.worker.set_paused(paused)
+        self.pause_button.config(text="Resume" if paused else "Pause")
+        self.step_button.config(state="normal" if paused else "disabled")
+
+    #Function that runs a single step of a paused simulation
+    def single_step(self):
+        if self.worker:
+            self.worker.step_once()
+
+    #Function that runs the rest of the simulation without waiting between ticks
+    def run_to_end(self):
+        if not self.worker:
+            return
+        self.worker.run_to_end()
+        self.pause_button.config(text="Pause")
+        self.step_button.config(state="disabled")
+
+    #Function that shows the recorded state of the simulation at the time entered by the user
+    #The simulation is paused first; resuming or stepping goes back to the live simulation
+    def seek_to_time(self):
+        if not self.worker and self.cached_trace is None:
+            return
+        try:
+            time = int(self.seek_entry.get())
+            if time < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Time must be a whole number >= 0.")
+            return
 
-    #Displays the current events that are happening during the simulation.
+        if self.worker and self.worker.is_alive() and not self.worker.paused:
+            self.toggle_pause()
+        if self.replay is None:
+            self.replay = Replay(self.trace_recorder.getvalue())
+        elif self.cached_trace is None:
+            self.replay.extend(self.trace_recorder.getvalue(len(self.replay.data)))
+        replay = self.replay
+        time = min(time, replay.end_time)
+        simulation = replay.seek(time)
+        self.canvas.delete("complete")
+        self.show_snapshot(SimulationSnapshot(simulation, False), "Replay Time")
+        self.log_message(f"\n###### Jumped to time {time} of the recorded run ######")
+        self._flush_logs()
+
+    #Adds a message of the window itself to the Simulation Log, next to the events of the simulation
     def log_message(self, message):
+        self.log_sink(message)
+
+    #Helper function that writes the events buffered since the last frame to the log with a single insert
+    #and trims the log to its newest LOG_CAPACITY lines
+    def _flush_logs(self):
+        lines = self.log_sink.drain()
+        if not lines:
+            return
+        if self.log_sink.dropped > self.logs_dropped:
+            lines.insert(0, f"... {self.log_sink.dropped - self.logs_dropped} lines skipped ...")
+            self.logs_dropped = self.log_sink.dropped
         self.log_text.config(state="normal") 
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        if line_count > LOG_CAPACITY:
+            self.log_text.delete("1.0", f"{line_count - LOG_CAPACITY + 1}.0")
         self.log_text.see(tk.END) 
         self.log_text.config(state="disabled") 
-        self.update_idletasks() 
 
     #Helper function that gives each process allocating a memory block an unique color
     def _get_color_for_pid(self, pid):
@@ -317,67 +667,188 @@ class VisualApp(tk.Tk):
         b = (pid * 35) % 200 + 55
         return f"#{r:02x}{g:02x}{b:02x}"
     
-    #Draws each process that has allocated a memory block
+    #Helper function that turns the blocks of a snapshot into the bars of the memory map
+    #Blocks narrower than a pixel are merged with their neighbors into aggregate bars, so there are never many more bars
+    #than pixels across the canvas. Returns a tuple (x1, x2, color, label, outline) for each bar
+    def _layout_memory(self, blocks, canvas_width):
+        scale_factor = (canvas_width - 2) / self.simulation.total_memory_size
+        bars = []
+        group_start = None
+        group_size = 0
+        group_used = 0
+
+        for start, end, size, is_free, pid in blocks:
+            if size * scale_factor < 1:
+                if group_start is None:
+                    group_start = start
+                group_size += size
+                group_used += 0 if is_free else size
+                if group_size * scale_factor < 1:
+                    continue
+                block_bar = None
+            else:
+                block_bar = (start, end, size, is_free, pid)
+
+            if group_start is not None:
+                bars.append(self._aggregate_bar(group_start, group_size, group_used, scale_factor))
+                group_start = None
+                group_size = group_used = 0
+            if block_bar is not None:
+                bars.append(self._block_bar(block_bar, scale_factor))
+
+        if group_start is not None:
+            bars.append(self._aggregate_bar(group_start, group_size, group_used, scale_factor))
+        return bars
+
+    #Helper function that returns the bar of a single block, labeled when the label fits inside it
+    def _block_bar(self, block, scale_factor):
+        start, end, size, is_free, pid = block
+        x1 = round(1 + start * scale_factor)
+        x2 = round(1 + (end + 1) * scale_factor)
+        label = f"PID: {pid}\nSize: {size}" if not is_free else f"Free\nSize: {size}"
+        if max(self.map_font.measure(line) for line in label.split("\n")) + 6 > x2 - x1:
+            label = None
+        return (x1, x2, self._get_color_for_pid(pid), label, "black")
+
+    #Helper function that returns the bar of several narrow blocks, in a shade of gray that gets darker
+    #the more of its memory is allocated
+    def _aggregate_bar(self, start, size, used, scale_factor):
+        x1 = round(1 + start * scale_factor)
+        x2 = max(x1 + 1, round(1 + (start + size) * scale_factor))
+        if used == 0:
+            color = self._get_color_for_pid(-1)
+        else:
+            shade = round(192 - 96 * used / size)
+            color = f"#{shade:02x}{shade:02x}{shade:02x}"
+        return (x1, x2, color, None, "")
+
+    #Draws the memory map from the latest snapshot from the worker
+    #Only bars that were not on the canvas in the previous frame are created, and only bars that are gone are deleted
     def draw_memory(self):
-        self.canvas.delete("all") 
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         if canvas_width <= 1 or canvas_height <= 1: return
         
-        if not self.simulation: return
-        
-        scale_factor = (canvas_width - 2) / self.simulation.total_memory_size
-        self.simulation._sort_blocks()
-        
-        for block in self.simulation.memory_blocks:
-            x1 = 1 + block.start * scale_factor
-            y1 = 1
-            x2 = 1 + (block.end + 1) * scale_factor
-            y2 = canvas_height - 2
-            color = self._get_color_for_pid(block.pid)
-            
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="black", width=2)
-            
-            text_content = f"PID: {block.pid}\nSize: {block.size}" if not block.is_free else f"Free\nSize: {block.size}"
-            
+        if not self.simulation or not self.snapshot: return
+
+        if self.map_size != (canvas_width, canvas_height):
+            self.canvas.delete("map")
+            self.map_items = {}
+            self.map_size = (canvas_width, canvas_height)
+            self.map_font = tkfont.nametofont("TkDefaultFont")
+
+        items = {}
+        for bar in self._layout_memory(self.snapshot.blocks, canvas_width):
+            bar_items = self.map_items.pop(bar, None)
+            if bar_items is None:
+                bar_items = self._draw_bar(bar, canvas_height)
+            items[bar] = bar_items
+
+        stale_items = [item for bar_items in self.map_items.values() for item in bar_items]
+        if stale_items:
+            self.canvas.delete(*stale_items)
+        self.map_items = items
+        self.canvas.tag_raise("label")
+
+    #Helper function that creates the canvas items of one bar of the memory map
+    def _draw_bar(self, bar, canvas_height):
+        x1, x2, color, label, outline = bar
+        bar_items = [self.canvas.create_rectangle(x1, 1, x2, canvas_height - 2, fill=color, outline=outline,
+                                                  width=2 if outline else 0, tags="map")]
+        if label:
             text_fill = "black"
-            if not block.is_free:
-                r, g, b = int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
-                brightness = (r * 299 + g * 587 + b * 114) / 1000
-                if brightness < 128:
-                    text_fill = "white"
-                
-            self.canvas.create_text((x1 + x2) / 2, canvas_height / 2, text=text_content, fill=text_fill)
-
-    #Visualizes the events of the simulation for each second in the simulation
+            r, g, b = int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+            brightness = (r * 299 + g * 587 + b * 114) / 1000
+            if brightness < 128:
+                text_fill = "white"
+            bar_items.append(self.canvas.create_text((x1 + x2) / 2, canvas_height / 2, text=label, fill=text_fill,
+                                                     tags=("map", "label")))
+        return bar_items
+
+    #Function that shows a snapshot of the simulation in the labels and the memory map
+    def show_snapshot(self, snapshot, time_label="Time"):
+        self.snapshot = snapshot
+        self.time_label_var.set(f"{time_label}: {snapshot.timeline}")
+        status = f"Processes Completed: {snapshot.processes_completed} / {snapshot.num_processes}"
+        if snapshot.processes_rejected:
+            status += f" (Rejected: {snapshot.processes_rejected})"
+        self.status_label_var.set(status)
+        self.metrics_label_var.set(self._format_metrics(snapshot.metrics))
+        self.draw_memory()
+
+    #Helper function that turns a metrics snapshot into the text of the metrics label
+    def _format_metrics(self, metrics):
+        lines = [
+            f"Fragmentation: {metrics['fragmentation']:.1%} (peak {metrics.get('peak_fragmentation', 0):.1%})   "
+            f"Holes: {metrics['holes']}   Largest Hole: {metrics['largest_hole']}   "
+            f"Waiting: {metrics['waiting']}   Average Wait: {metrics['average_wait']:.1f}   "
+            f"Max Wait: {metrics.get('max_wait', 0)}"
+        ]
+        if "operations" in metrics:
+            operations = metrics["operations"]
+            lines.append("   ".join(
+                f"{name}: {operations[name]['calls']} calls, {operations[name]['mean_us']:.1f} us avg"
+                for name in ("allocate", "free_memory", "coalesce", "compact")
+            ) + f"   Blocks Scanned/Find: {metrics['blocks_scanned_per_find']:.2f}")
+        return "\n".join(lines)
+
+    #Visualizes the state of the simulation once per frame, from the newest snapshot the worker has published
     def update_simulation(self):
-        if not self.simulation:
+        if not self.worker:
             return 
 
-        is_running = self.simulation.step()
-        self.time_label_var.set(f"Time: {self.simulation.timeline}")
-        self.status_label_var.set(f"Processes Completed: {self.simulation.processes_completed} / {self.simulation.num_processes}")
-        self.draw_memory()
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.worker.snapshots.get_nowait()
+            except queue.Empty:
+                break
+        self._flush_logs()
+
+        if snapshot is None:
+            self.after(FRAME_INTERVAL, self.update_simulation)
+            return
+
+        if not snapshot.done:
+            self.show_snapshot(snapshot)
+            self.after(FRAME_INTERVAL, self.update_simulation)
+            return
+
+        if self.result_cache is not None and snapshot.error is None:
+            self.result_cache.put(self.cache_key, {"metrics": snapshot.metrics}, self.trace_recorder.getvalue())
+        self._show_complete(snapshot)
+
+    #Function that shows the final snapshot of a finished simulation and the end of simulation message,
+    #or the error of a simulation that failed
+    def _show_complete(self, snapshot):
+        self.show_snapshot(snapshot)
+        status_message = f"SIMULATION COMPLETE! All {snapshot.num_processes} processes finished."
+        if snapshot.error is not None:
+            status_message = f"SIMULATION FAILED at time {snapshot.timeline}: {snapshot.error}"
+        elif snapshot.processes_rejected:
+            status_message = (f"SIMULATION COMPLETE! {snapshot.processes_completed} processes finished, "
+                              f"{snapshot.processes_rejected} rejected.")
+        self.time_label_var.set(f"Final Time: {snapshot.timeline}")
+        self.status_label_var.set(status_message)
+        self.log_message(f"\n###### {status_message} ######") 
+        self._flush_logs()
         
-        if is_running:
-            self.after(1000, self.update_simulation)
-        else:
-            status_message = f"SIMULATION COMPLETE! All {self.simulation.num_processes} processes finished."
-            self.time_label_var.set(f"Final Time: {self.simulation.timeline}")
-            self.status_label_var.set(status_message)
-            self.log_message(f"\n###### {status_message} ######") 
-            
-            self.new_sim_button.pack(pady=5)
-            
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            self.canvas.create_text(
-                canvas_width / 2,
-                canvas_height / 2,
-                text="Simulation Complete!",
-                font=("Arial", 24, "bold"),
-                fill="black"
-            )
+        for button in (self.pause_button, self.step_button, self.run_to_end_button):
+            button.config(state="disabled")
+        self.new_sim_button.pack(pady=5)
+        
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        self.canvas.create_text(
+            canvas_width / 2,
+            canvas_height / 2,
+            text="Simulation Failed!" if snapshot.error is not None else "Simulation Complete!",
+            font=("Arial", 24, "bold"),
+            fill="black",
+            tags="complete"
+        )
+        if snapshot.error is not None:
+            messagebox.showerror("Simulation Failed", snapshot.error, parent=self)
 
 if __name__ == "__main__":
     input_app = InputForm()
@@ -0,0 +1,84 @@
+import time
+from collections import deque
+
+#Profiling counters of a MemorySimulator
+#The counters are collected by wrapping the methods of one simulator instance, so a simulator created without
+#metrics runs the plain methods and pays nothing for them.
+
+PROFILED_OPERATIONS = ("allocate", "free_memory", "coalesce", "compact", "step")
+
+class SimulatorMetrics:
+    #Defines the constructor of the counters and installs them on the simulator
+    #history is the number of recent ticks and process waits kept for charts; older entries are dropped
+    def __init__(self, sim, history=10000):
+        self.sim = sim
+        self.calls = dict.fromkeys(PROFILED_OPERATIONS, 0)
+        self.seconds = dict.fromkeys(PROFILED_OPERATIONS, 0.0)
+        self.scanned_at_start = sim.policy.scanned
+        #(time, external fragmentation, hole count, largest hole) after every tick
+        self.ticks = deque(maxlen=history)
+        #(pid, ticks waited) of the most recently allocated processes
+        self.waits = deque(maxlen=history)
+        self.peak_fragmentation = 0.0
+        self.max_wait = 0
+
+        for name in PROFILED_OPERATIONS:
+            setattr(sim, name, self._profiled(name, getattr(sim, name)))
+
+    #Helper method that wraps a method of the simulator so its calls are counted and timed
+    def _profiled(self, name, method):
+        calls = self.calls
+        seconds = self.seconds
+        perf_counter = time.perf_counter
+        after = getattr(self, f"_after_{name}", None)
+
+        def profiled(*args):
+            start = perf_counter()
+            result = method(*args)
+            seconds[name] += perf_counter() - start
+            calls[name] += 1
+            if after is not None:
+                after(result, *args)
+            return result
+        return profiled
+
+    #Helper method that records the waiting time of a process that was just allocated
+    def _after_allocate(self, allocated, process):
+        if allocated:
+            #A process shared with a fork is copied when it is allocated, so look up the allocated copy
+            process = self.sim.running[process.pid]
+            wait = process.start_time - max(process.arrival_time, 1)
+            self.waits.append((process.pid, wait))
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+    #Helper method that records the fragmentation of memory at the end of a tick
+    def _after_step(self, is_running):
+        if not is_running:
+            return
+        sim = self.sim
+        fragmentation = sim.external_fragmentation()
+        self.ticks.append((sim.timeline, fragmentation, len(sim.policy), sim.policy.largest()))
+        if fragmentation > self.peak_fragmentation:
+            self.peak_fragmentation = fragmentation
+
+    #Returns the counters as a dict of plain numbers
+    def snapshot(self):
+        operations = {}
+        for name in PROFILED_OPERATIONS:
+            calls = self.calls[name]
+            operations[name] = {
+                "calls": calls,
+                "total_ms": round(self.seconds[name] * 1e3, 3),
+                "mean_us": round(self.seconds[name] * 1e6 / calls, 3) if calls else 0.0,
+            }
+        finds = self.calls["allocate"]
+        scanned = self.sim.policy.scanned - self.scanned_at_start
+        return {
+            "operations": operations,
+            "finds": finds,
+            "blocks_scanned": scanned,
+            "blocks_scanned_per_find": round(scanned / finds, 3) if finds else 0.0,
+            "peak_fragmentation": round(self.peak_fragmentation, 4),
+            "max_wait": self.max_wait,
+        }
@@ -1,19 +1,55 @@
 #Defines the attributes of each process
+#Slotted so that large traces do not pay for a __dict__ per process
+#clock is the simulation running the process, which remaining_time reads the current time from
 class Process:
-    def __init__(self, pid, size, burst_time):
+    __slots__ = (
+        "pid", "size", "burst_time", "is_allocated", "is_finished", "is_rejected",
+        "arrival_time", "start_time", "finish_time", "clock",
+    )
+
+    def __init__(self, pid, size, burst_time, arrival_time=0):
         self.pid = pid
         self.size = size
         self.burst_time = burst_time
-        self.remaining_time = burst_time
+        self.arrival_time = arrival_time
         self.is_allocated = False
         self.is_finished = False
-        self.allocated_block_index = -1
+        self.is_rejected = False
+        self.start_time = -1
+        self.finish_time = -1
+        self.clock = None
+
+    #Returns the ticks the process still has to run
+    #A running process finishes burst_time ticks after it started, so nothing has to count down on every tick
+    @property
+    def remaining_time(self):
+        if self.is_finished:
+            return 0
+        if self.is_allocated:
+            return self.start_time + self.burst_time - self.clock.timeline
+        return self.burst_time
+
+    #Returns a copy of the process, for simulations that branch off from each other
+    def copy(self):
+        clone = Process(self.pid, self.size, self.burst_time, self.arrival_time)
+        clone.is_allocated = self.is_allocated
+        clone.is_finished = self.is_finished
+        clone.is_rejected = self.is_rejected
+        clone.start_time = self.start_time
+        clone.finish_time = self.finish_time
+        clone.clock = self.clock
+        return clone
 
 #Defines the attributes of the displayed memory block
+#prev and next link the blocks in address order
 class MemoryBlock:
+    __slots__ = ("start", "end", "size", "is_free", "pid", "prev", "next")
+
     def __init__(self, start, end, size, is_free=True, pid=-1):
         self.start = start
         self.end = end
         self.size = size
         self.is_free = is_free
-        self.pid = pid
\ No newline at end of file
+        self.pid = pid
+        self.prev = None
+        self.next = None
\ No newline at end of file
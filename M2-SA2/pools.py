@@ -0,0 +1,392 @@
+import itertools
+import multiprocessing
+from collections import deque
+from simulator import MemorySimulator
+from workload import read_workload
+from events import OFF
+
+#Partitioned memory made of several independent pools, like the memory nodes of a NUMA machine
+#Every pool is a MemorySimulator with its own block list, so finding, coalescing and compacting only ever cover
+#one pool. A placement policy routes each process to a pool when it arrives, and the pools then run on their own
+#until the next arrivals need routing. With workers, the pools are spread over worker processes that advance in
+#parallel and synchronize with the coordinator between two batches of arrivals.
+
+#Defines the behaviour shared by all placement policies
+#choose is called once per process in arrival order with the {'size', 'burst', 'arrival'} entry and the state of
+#every pool: the metrics_snapshot of its simulator plus total_memory, capacity and pending, the memory of the
+#processes routed to it that it has not admitted yet
+class PlacementPolicy:
+    name = ""
+    label = ""
+    #Whether choose reads the state of the pools. Policies that do not can route many ticks of arrivals at once,
+    #so the pools synchronize far less often
+    uses_state = True
+
+    #Prepares the policy for a run over pools of the given sizes
+    def reset(self, pool_sizes):
+        pass
+
+    def choose(self, entry, pools):
+        raise NotImplementedError
+
+#Helper function that returns the indexes of the pools a process of the given size fits in, or of all pools when
+#it fits in none of them, so it is rejected by the pool that comes closest
+def _candidates(size, pools):
+    fitting = [i for i, pool in enumerate(pools) if pool["capacity"] >= size]
+    if fitting:
+        return fitting
+    largest = max(pool["capacity"] for pool in pools)
+    return [i for i, pool in enumerate(pools) if pool["capacity"] == largest]
+
+#Sends the processes to the pools in turn
+class RoundRobinPlacement(PlacementPolicy):
+    name = "round_robin"
+    label = "Round Robin"
+    uses_state = False
+
+    def reset(self, pool_sizes):
+        self.count = len(pool_sizes)
+        self.next = 0
+
+    def choose(self, entry, pools):
+        index = self.next
+        self.next = (self.next + 1) % self.count
+        return index
+
+#Sends each process to the pool with the least external fragmentation among those it fits in,
+#and between equally fragmented pools to the one with the most free memory left
+class LeastFragmentedPlacement(PlacementPolicy):
+    name = "least_fragmented"
+    label = "Least Fragmented"
+
+    def choose(self, entry, pools):
+        return min(_candidates(entry['size'], pools),
+                   key=lambda i: (pools[i]["fragmentation"], pools[i]["pending"] - pools[i]["free_memory"]))
+
+#Sends each process to the pool with the most free memory left among those it fits in
+class MostFreePlacement(PlacementPolicy):
+    name = "most_free"
+    label = "Most Free"
+
+    def choose(self, entry, pools):
+        return max(_candidates(entry['size'], pools),
+                   key=lambda i: (pools[i]["free_memory"] - pools[i]["pending"], -i))
+
+#Sends each process to a pool by its size, so small and large processes never fragment each other's pools
+#bounds holds the largest size of every pool but the last, which takes all larger processes. By default pool i of k
+#takes sizes up to the size of the last pool divided by 2 ** (k - 1 - i)
+class SizeClassPlacement(PlacementPolicy):
+    name = "size_class"
+    label = "Size Class"
+    uses_state = False
+
+    def __init__(self, bounds=None):
+        self.bounds = bounds
+
+    def reset(self, pool_sizes):
+        count = len(pool_sizes)
+        if self.bounds is None:
+            self.limits = [pool_sizes[-1] >> (count - 1 - i) for i in range(count - 1)]
+        elif len(self.bounds) != count - 1:
+            raise ValueError(f"Size classes need {count - 1} bounds for {count} pools.")
+        else:
+            self.limits = sorted(self.bounds)
+
+    def choose(self, entry, pools):
+        size = entry['size']
+        for i, limit in enumerate(self.limits):
+            if size <= limit:
+                return i
+        return len(self.limits)
+
+PLACEMENT_POLICIES = {
+    policy.name: policy
+    for policy in (RoundRobinPlacement, LeastFragmentedPlacement, MostFreePlacement, SizeClassPlacement)
+}
+
+#Function that returns a placement policy from its name, or the policy itself when one is given
+def get_placement_policy(policy):
+    if not isinstance(policy, str):
+        return policy
+    try:
+        return PLACEMENT_POLICIES[policy]()
+    except KeyError:
+        raise ValueError(f"Unknown placement policy '{policy}'. Choose from: {', '.join(PLACEMENT_POLICIES)}.")
+
+#Processes routed at once by placement policies that do not read the pools; a batch only ends between two arrival times
+BATCH_SIZE = 4096
+
+#Function that splits a memory size into count pools of equal size, the first pools taking the remainder
+def split_memory(total_memory, count):
+    if count <= 0 or total_memory < count:
+        raise ValueError("Memory must be split into between 1 and total memory pools.")
+    size, remainder = divmod(total_memory, count)
+    return [size + (i < remainder) for i in range(count)]
+
+#Iterator over the processes routed to one pool, which the coordinator keeps adding to while the pool runs
+class _PoolInputs:
+    def __init__(self):
+        self.entries = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.entries:
+            raise StopIteration
+        return self.entries.popleft()
+
+#Defines some of the pools of a partitioned simulation, and everything that runs them
+#The coordinator owns one group per worker process, or a single group when the pools run in its own process
+class _PoolGroup:
+    def __init__(self, indexes, pool_sizes, settings):
+        self.indexes = indexes
+        self.inputs = {i: _PoolInputs() for i in indexes}
+        self.sims = {
+            i: MemorySimulator(pool_sizes[i], settings["ch_interval"], settings["sc_interval"], self.inputs[i], None,
+                               event_driven=settings["event_driven"], eager_coalescing=settings["eager_coalescing"],
+                               compaction=settings["compaction"], policy=settings["policy"], log_level=OFF)
+            for i in indexes
+        }
+        #Global pid of every process routed to a pool, by its pid in that pool
+        self.pids = {i: [] for i in indexes}
+        self.peak_fragmentation = dict.fromkeys(indexes, 0.0)
+        self._reply = None
+
+    #Hands the routed processes to their pools, then steps every pool until its next step would reach limit
+    #(None runs the pools to their end), so every unfinished pool ends on the tick before limit, and returns the state
+    #of every pool
+    def sync(self, assignments, limit):
+        fed = set()
+        for index, pid, entry in assignments:
+            self.inputs[index].entries.append(entry)
+            self.pids[index].append(pid)
+            fed.add(index)
+        for index in fed:
+            self.sims[index].poll_inputs()
+
+        for index, sim in self.sims.items():
+            peak = self.peak_fragmentation[index]
+            while not sim.is_done() and (limit is None or sim.next_step_time() < limit):
+                sim.step()
+                fragmentation = sim.external_fragmentation()
+                if fragmentation > peak:
+                    peak = fragmentation
+            if limit is not None:
+                sim.skip_to(limit - 1)
+            self.peak_fragmentation[index] = peak
+        return [(index, self._state(index)) for index in self.indexes]
+
+    #Helper method that returns the state of one pool that placement policies and results are built from
+    def _state(self, index):
+        sim = self.sims[index]
+        state = sim.metrics_snapshot()
+        state.update(
+            total_memory=sim.total_memory_size, capacity=sim.policy.capacity(), num_processes=sim.num_processes,
+            started=sim.processes_started, total_wait=sim.total_wait,
+            peak_fragmentation=round(self.peak_fragmentation[index], 4), done=sim.is_done(),
+        )
+        return state
+
+    #Returns the blocks of every pool as (start, end, size, is_free, pid) within the pool, with global pids
+    def blocks(self):
+        result = []
+        for index in self.indexes:
+            pids = self.pids[index]
+            result.append((index, [(b.start, b.end, b.size, b.is_free, b.pid if b.is_free else pids[b.pid - 1])
+                                   for b in self.sims[index].memory_blocks]))
+        return result
+
+    #Runs a method now; the reply is picked up by receive, like the reply of a worker process
+    def send(self, method, *args):
+        self._reply = getattr(self, method)(*args)
+
+    def receive(self):
+        reply, self._reply = self._reply, None
+        return reply
+
+    def close(self):
+        pass
+
+#Function that runs a group of pools in a worker process, answering the requests of the coordinator
+def _serve_group(conn, indexes, pool_sizes, settings):
+    group = _PoolGroup(indexes, pool_sizes, settings)
+    while True:
+        method, args = conn.recv()
+        if method == "close":
+            break
+        try:
+            conn.send((True, getattr(group, method)(*args)))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+#Handle of a group of pools running in a worker process, with the same send and receive as a local _PoolGroup
+class _WorkerGroup:
+    def __init__(self, context, indexes, pool_sizes, settings):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve_group, args=(child_conn, indexes, pool_sizes, settings),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, method, *args):
+        self.conn.send((method, args))
+
+    def receive(self):
+        ok, reply = self.conn.recv()
+        if not ok:
+            raise reply
+        return reply
+
+    def close(self):
+        try:
+            self.conn.send(("close", ()))
+        except OSError:
+            pass
+        self.process.join()
+
+class PartitionedSimulator:
+    #Defines the constructor of the partitioned simulation
+    #pool_sizes is the size of every pool; split_memory divides one memory size into equal pools
+    #placement picks the placement policy by name ("round_robin", "least_fragmented", "most_free" or "size_class")
+    #or instance. process_inputs and the other settings are the same as for MemorySimulator and apply to every pool
+    #With workers, the pools are spread over that many worker processes; call close, or use the simulation in a
+    #with statement, to stop them
+    def __init__(self, pool_sizes, ch_interval, sc_interval, process_inputs, placement="round_robin", workers=None,
+                 event_driven=True, eager_coalescing=False, compaction="full", policy="first_fit"):
+        if not pool_sizes or any(size <= 0 for size in pool_sizes):
+            raise ValueError("Every pool needs a size > 0.")
+        self.pool_sizes = list(pool_sizes)
+        self.total_memory_size = sum(self.pool_sizes)
+        self.offsets = list(itertools.accumulate([0] + self.pool_sizes[:-1]))
+        self.placement = get_placement_policy(placement)
+        self.placement.reset(self.pool_sizes)
+        self.process_inputs = process_inputs
+        settings = {
+            "ch_interval": ch_interval, "sc_interval": sc_interval, "event_driven": event_driven,
+            "eager_coalescing": eager_coalescing, "compaction": compaction, "policy": policy,
+        }
+
+        count = len(self.pool_sizes)
+        workers = min(workers or 1, count)
+        if workers == 1:
+            self.groups = [_PoolGroup(list(range(count)), self.pool_sizes, settings)]
+        else:
+            context = multiprocessing.get_context()
+            self.groups = [_WorkerGroup(context, list(range(w, count, workers)), self.pool_sizes, settings)
+                           for w in range(workers)]
+        #Group that runs every pool
+        self._group_of = [index % workers for index in range(count)]
+
+        self._inputs = iter(read_workload(process_inputs) if isinstance(process_inputs, str) else process_inputs)
+        self._next_input = next(self._inputs, None)
+        self._last_arrival = 0
+        self._routed = 0
+        self._finished = False
+        self.pools = self._sync([[] for _ in self.groups], 0)
+
+    #Helper method that sends the processes routed to each group, advances every group to limit in parallel and
+    #returns the state of every pool in pool order
+    def _sync(self, assignments, limit):
+        for group, routed in zip(self.groups, assignments):
+            group.send("sync", routed, limit)
+        pools = [None] * len(self.pool_sizes)
+        for group in self.groups:
+            for index, state in group.receive():
+                pools[index] = state
+        return pools
+
+    #Helper method that reads the next batch of processes to route: the processes arriving at the next arrival time,
+    #or with a placement policy that does not read the pools, everything up to a few thousand processes
+    def _read_batch(self, max_time):
+        batch = []
+        while self._next_input is not None:
+            arrival = self._next_input.get('arrival', 0)
+            if arrival < self._last_arrival:
+                raise ValueError(f"Process {self._routed + len(batch) + 1} arrives at {arrival}, "
+                                 f"before the process listed before it ({self._last_arrival}).")
+            if max_time is not None and arrival > max_time:
+                break
+            if batch and arrival != self._last_arrival and (self.placement.uses_state or len(batch) >= BATCH_SIZE):
+                break
+            self._last_arrival = arrival
+            batch.append(self._next_input)
+            self._next_input = next(self._inputs, None)
+        return batch
+
+    #Function that routes the next batch of arriving processes and advances all pools until the arrivals after it,
+    #which is one synchronization of the pools. Returns False once every pool has finished
+    #max_time stops routing processes arriving after it and stops the pools once their timeline reaches it
+    def step(self, max_time=None):
+        if self._finished:
+            return False
+        batch = self._read_batch(max_time)
+        assignments = [[] for _ in self.groups]
+        for pool in self.pools:
+            pool["pending"] = 0
+        for entry in batch:
+            index = self.placement.choose(entry, self.pools)
+            self._routed += 1
+            self.pools[index]["pending"] += entry['size']
+            assignments[self._group_of[index]].append((index, self._routed, entry))
+
+        #The pools run every tick before the next arrival, which always comes after the arrivals of the batch
+        limit = self._next_input.get('arrival', 0) if self._next_input is not None else None
+        if max_time is not None:
+            limit = max_time + 1 if limit is None else min(limit, max_time + 1)
+        self.pools = self._sync(assignments, limit)
+        #Once nothing is left to route, the sync above ran the pools to their end or to max_time
+        if self._next_input is None or (max_time is not None and self._next_input.get('arrival', 0) > max_time):
+            self._finished = True
+        return True
+
+    #Function that runs the simulation to its end, or until max_time, and returns its metrics
+    def run(self, max_time=None):
+        while self.step(max_time):
+            pass
+        return self.metrics_snapshot()
+
+    #Returns the totals over all pools, and the state of every pool under "pools"
+    #A process can only use the holes of its own pool, so largest_hole is the largest hole of any pool and
+    #fragmentation compares it with all free memory
+    def metrics_snapshot(self):
+        pools = self.pools
+        started = sum(pool["started"] for pool in pools)
+        free = sum(pool["free_memory"] for pool in pools)
+        largest = max(pool["largest_hole"] for pool in pools)
+        snapshot = {"time": max(pool["time"] for pool in pools)}
+        for name in ("completed", "rejected", "running", "waiting", "free_memory", "holes", "bytes_moved",
+                     "blocks_moved", "num_processes"):
+            snapshot[name] = sum(pool[name] for pool in pools)
+        snapshot.update(
+            largest_hole=largest,
+            fragmentation=round(1 - largest / free, 4) if free else 0.0,
+            average_wait=round(sum(pool["total_wait"] for pool in pools) / started, 4) if started else 0.0,
+            peak_fragmentation=max(pool["peak_fragmentation"] for pool in pools),
+            pools=pools,
+        )
+        return snapshot
+
+    #Returns the blocks of all pools as (start, end, size, is_free, pid) in one address space, pool after pool
+    def blocks(self):
+        for group in self.groups:
+            group.send("blocks")
+        result = [None] * len(self.pool_sizes)
+        for group in self.groups:
+            for index, blocks in group.receive():
+                offset = self.offsets[index]
+                result[index] = [(start + offset, end + offset, size, is_free, pid)
+                                 for start, end, size, is_free, pid in blocks]
+        return [block for blocks in result for block in blocks]
+
+    #Stops the worker processes
+    def close(self):
+        for group in self.groups:
+            group.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
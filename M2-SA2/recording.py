@@ -0,0 +1,239 @@
+import io
+import json
+import os
+from bisect import bisect_left, bisect_right
+import struct
+import threading
+import zlib
+from events import (DEBUG, OFF, EventSink, make_sink, TickStarted, Allocated, Finished, Rejected, CoalesceStarted,
+                    CompactionStarted, BlockMoved)
+
+#Binary trace of a simulation run with periodic checkpoints, and random-access replay of such a trace
+#A trace starts with a header holding the settings and processes of the run, followed by fixed-size event records.
+#Every checkpoint_interval ticks a compressed checkpoint of the simulator state is written in between, so jumping to
+#a tick only needs the nearest checkpoint before it and the ticks after that checkpoint. A checkpoint holds the live
+#processes only; what happened to the finished ones is in the event records before it.
+
+MAGIC = b"MSIMTRC1"
+
+#Record layout: kind, time and up to three integer fields
+_RECORD = struct.Struct("<Bqqqq")
+_LENGTH = struct.Struct("<I")
+
+TICK, ALLOCATED, FINISHED, REJECTED, COALESCE, COMPACT, MOVED, CHECKPOINT = range(1, 9)
+
+_EVENT_KINDS = {
+    TickStarted: TICK, Allocated: ALLOCATED, Finished: FINISHED, Rejected: REJECTED,
+    CoalesceStarted: COALESCE, CompactionStarted: COMPACT, BlockMoved: MOVED,
+}
+
+#Records the events of a simulation as a binary trace
+#Pass it as the trace of a MemorySimulator; out is a binary file, or None to keep the trace in memory
+class TraceRecorder(EventSink):
+    def __init__(self, out=None, checkpoint_interval=1000):
+        super().__init__(DEBUG)
+        self.out = out if out is not None else io.BytesIO()
+        self.checkpoint_interval = checkpoint_interval
+        self.next_checkpoint = 0
+        self._lock = threading.Lock()
+
+    #Writes the header of the trace, called by the simulator before it logs anything
+    #Processes read from a workload file are stored as the path of the file instead of the processes themselves
+    def start(self, sim):
+        if isinstance(sim.process_inputs, str):
+            processes = os.path.abspath(sim.process_inputs)
+        elif sim.keep_history:
+            processes = list(sim.process_inputs)
+        else:
+            raise ValueError("A trace needs the processes as a list or a workload file.")
+        config = {
+            "total_memory": sim.total_memory_size,
+            "ch_interval": sim.ch_time,
+            "sc_interval": sim.sc_time,
+            "processes": processes,
+            "event_driven": sim.event_driven,
+            "eager_coalescing": sim.eager_coalescing,
+            "compaction": sim.compaction.name,
+            "policy": sim.policy.name,
+            "checkpoint_interval": self.checkpoint_interval,
+        }
+        header = json.dumps(config).encode()
+        with self._lock:
+            self.out.write(MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def __call__(self, event):
+        kind = _EVENT_KINDS.get(type(event))
+        if kind is None:
+            return
+        if kind == TICK or kind == COALESCE or kind == COMPACT:
+            record = _RECORD.pack(kind, event.time, 0, 0, 0)
+        elif kind == REJECTED:
+            reason = event.reason.encode()
+            record = _RECORD.pack(kind, event.time, event.pid, len(reason), 0) + reason
+        elif kind == MOVED:
+            record = _RECORD.pack(kind, event.time, event.pid, event.old_start, event.new_start)
+        else:
+            record = _RECORD.pack(kind, event.time, event.pid, event.start, event.end)
+        with self._lock:
+            self.out.write(record)
+
+    #Writes a checkpoint once the timeline reaches the next multiple of the checkpoint interval
+    #Called by the simulator after every step
+    def end_tick(self, sim):
+        if sim.timeline < self.next_checkpoint:
+            return
+        payload = zlib.compress(json.dumps(sim.checkpoint(), separators=(",", ":")).encode(), 1)
+        with self._lock:
+            self.out.write(_RECORD.pack(CHECKPOINT, sim.timeline, len(payload), 0, 0) + payload)
+        self.next_checkpoint = (sim.timeline // self.checkpoint_interval + 1) * self.checkpoint_interval
+
+    #Returns the trace recorded so far, from byte start on; a trace written to a file needs the file to be opened for
+    #reading too
+    def getvalue(self, start=0):
+        with self._lock:
+            if isinstance(self.out, io.BytesIO):
+                with self.out.getbuffer() as view:
+                    return view[start:].tobytes()
+            position = self.out.tell()
+            self.out.seek(start)
+            data = self.out.read()
+            self.out.seek(position)
+            return data
+
+    #Writes a complete trace recorded earlier, like one from a ResultCache, instead of recording a new one
+    def load(self, data):
+        with self._lock:
+            self.out.write(data)
+
+#Helper function that returns the settings in the header of a trace and the offset of its first record
+def _read_header(data):
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a memory simulation trace.")
+    offset = len(MAGIC)
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    return json.loads(data[offset:offset + length]), offset + length
+
+#Function that returns the settings a trace was recorded with, like its checkpoint_interval, from the bytes of the trace
+def trace_config(data):
+    return _read_header(data)[0]
+
+#Random-access view of a recorded trace
+#source is the bytes of a trace or the path of a trace file. A trace that is still being recorded can be viewed as
+#well, and grown with the records written since through extend
+class Replay:
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        self.config, offset = _read_header(data)
+        self.data = data
+        self._first = offset
+
+        #Offsets of the checkpoints, and of the first record of every tick, in time order
+        self.checkpoints = []
+        self.ticks = []
+        self.end_time = 0
+        self._end = offset
+        self._index()
+
+    #Appends the bytes recorded after the end of the data seen so far, like TraceRecorder.getvalue(len(replay.data))
+    #returns them, and indexes the records they complete, so growing the view never reads the trace again
+    def extend(self, data):
+        if not data:
+            return
+        if not isinstance(self.data, bytearray):
+            self.data = bytearray(self.data)
+        self.data += data
+        self._index()
+
+    #Helper method that indexes the complete records after the last one indexed
+    def _index(self):
+        data = self.data
+        offset = self._end
+        while offset + _RECORD.size <= len(data):
+            kind, time, a, b, _ = _RECORD.unpack_from(data, offset)
+            size = _RECORD.size
+            if kind == CHECKPOINT:
+                size += a
+            elif kind == REJECTED:
+                size += b
+            if offset + size > len(data):
+                break
+            if kind == CHECKPOINT:
+                self.checkpoints.append((time, offset))
+            elif kind == TICK:
+                self.ticks.append((time, offset))
+            self.end_time = max(self.end_time, time)
+            offset += size
+        self._end = offset
+
+    #Returns the decoded events of the ticks from start to end, both included
+    def events(self, start=0, end=None):
+        offset = self._first
+        if start > 0:
+            i = bisect_left(self.ticks, (start,))
+            offset = self.ticks[i][1] if i < len(self.ticks) else self._end
+        events = []
+        for event in self._decode(offset):
+            if end is not None and event.time > end:
+                break
+            if event.time >= start:
+                events.append(event)
+        return events
+
+    #Helper method that decodes the event records from an offset onwards, skipping checkpoints
+    def _decode(self, offset):
+        while offset < self._end:
+            kind, time, a, b, c = _RECORD.unpack_from(self.data, offset)
+            offset += _RECORD.size
+            if kind == CHECKPOINT:
+                offset += a
+            elif kind == TICK:
+                yield TickStarted(time)
+            elif kind == ALLOCATED:
+                yield Allocated(time, a, b, c)
+            elif kind == FINISHED:
+                yield Finished(time, a, b, c)
+            elif kind == REJECTED:
+                yield Rejected(time, a, self.data[offset:offset + b].decode())
+                offset += b
+            elif kind == COALESCE:
+                yield CoalesceStarted(time)
+            elif kind == COMPACT:
+                yield CompactionStarted(time)
+            elif kind == MOVED:
+                yield BlockMoved(time, a, b, c)
+
+    #Returns the checkpointed state nearest before the given time
+    def checkpoint_before(self, time):
+        i = bisect_right(self.checkpoints, (time, len(self.data)))
+        if i == 0:
+            raise ValueError("The trace has no checkpoint before that time.")
+        offset = self.checkpoints[i - 1][1]
+        _, _, length, _, _ = _RECORD.unpack_from(self.data, offset)
+        start = offset + _RECORD.size
+        return json.loads(zlib.decompress(self.data[start:start + length]))
+
+    #Returns a simulator in the state it had at the given time
+    #The nearest checkpoint is restored and only the ticks after it are simulated again, logging to logger_func
+    #In event-driven mode, ticks where nothing happened show the state of the last event before them
+    def seek(self, time, logger_func=None, log_level=OFF):
+        from simulator import MemorySimulator
+
+        config = self.config
+        sim = MemorySimulator(
+            config["total_memory"], config["ch_interval"], config["sc_interval"], config["processes"], None,
+            event_driven=config["event_driven"], eager_coalescing=config["eager_coalescing"],
+            compaction=config["compaction"], policy=config["policy"], log_level=OFF,
+            state=self.checkpoint_before(time),
+        )
+        sim.sink = make_sink(logger_func, log_level)
+        sim.log_level = sim.sink.level
+        while sim.timeline < time and not sim.is_done():
+            if sim.event_driven and sim._next_event_time() > time:
+                break
+            sim.step()
+        return sim
@@ -0,0 +1,187 @@
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from workload import read_workload
+
+#Persistent cache of simulation results on disk
+#MemorySimulator is deterministic, so a run is fully described by its settings and its workload. Results are stored
+#as JSON under a SHA-256 hash of both, next to the trace of the run when one was recorded. The total size of the
+#cache is bounded: once it grows past max_bytes the least recently used entries are deleted until it is back under
+#EVICT_TO of max_bytes, where the modification time of an entry is the time it was last stored or read.
+
+#Part of every key; bump it when a change to the simulator changes its results, so older entries are never found
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+#Share of max_bytes an eviction brings the cache down to, so the directory is only listed again after many stores
+EVICT_TO = 0.9
+
+#Number of workload entries hashed per update of the hash
+_DIGEST_CHUNK = 4096
+
+#Function that returns the directory of the cache: $MSIM_CACHE_DIR, or memory-simulator in the user cache directory
+def default_cache_dir():
+    directory = os.environ.get("MSIM_CACHE_DIR")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "memory-simulator")
+
+#Function that returns the hash of the processes of a workload, or None when they can only be read once
+#processes is a list of {'size', 'burst', 'arrival'} entries or the path of a workload file, which is read through once;
+#the same processes give the same hash whether they come from a list or from a file of any format
+def workload_digest(processes):
+    if isinstance(processes, str):
+        entries = read_workload(processes)
+    elif hasattr(processes, "__len__"):
+        entries = iter(processes)
+    else:
+        return None
+    digest = hashlib.sha256()
+    while True:
+        chunk = list(itertools.islice(entries, _DIGEST_CHUNK))
+        if not chunk:
+            return digest.hexdigest()
+        digest.update(b"".join(b"%d,%d,%d;" % (p['size'], p['burst'], p.get('arrival', 0)) for p in chunk))
+
+class ResultCache:
+    #Defines the constructor of the cache; the directory is created on the first store
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        #Bytes the cache takes, counted by the first store and kept up to date by the later ones; entries stored by
+        #other processes sharing the directory are only counted by the next eviction
+        self._size = None
+
+    #Returns the key of a run from the kind of result, the settings of the run and the hash of its workload
+    #Different kinds of results of the same run, like the summary of the headless runner and the metrics of the GUI,
+    #are stored under different keys. Returns None when the workload has no hash
+    def key(self, kind, settings, digest):
+        if digest is None:
+            return None
+        config = json.dumps({"version": CACHE_VERSION, "kind": kind, "settings": settings, "workload": digest},
+                            sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(config.encode()).hexdigest()
+
+    #Helper method that returns the path of a file of an entry
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    #Returns the stored result of a key, or None on a miss, and marks the entry as recently used
+    def get(self, key):
+        if key is None:
+            return None
+        path = self._path(key, ".json")
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            #A damaged entry is a miss, and is replaced by the next store
+            return None
+        for extension in (".json", ".trace"):
+            try:
+                os.utime(self._path(key, extension))
+            except OSError:
+                pass
+        return result
+
+    #Returns the trace stored with a key, or None when the entry has no trace
+    def get_trace(self, key):
+        if key is None:
+            return None
+        try:
+            with open(self._path(key, ".trace"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    #Stores the result of a key, and the bytes of its trace when given, then evicts entries once the cache is too large
+    #Files are written under a temporary name and renamed, so concurrent runs never read half an entry.
+    #A cache that cannot be written to only means the next run is simulated again, so errors are ignored
+    def put(self, key, result, trace=None):
+        if key is None:
+            return
+        #A trace larger than the whole cache would only be evicted again right away
+        if trace is not None and len(trace) > self.max_bytes:
+            trace = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            added = 0
+            if trace is not None:
+                added += self._write(self._path(key, ".trace"), trace)
+            added += self._write(self._path(key, ".json"), json.dumps(result).encode())
+            if self._size is None:
+                self.evict()
+            elif self._size + added > self.max_bytes:
+                self.evict(int(self.max_bytes * EVICT_TO))
+            else:
+                self._size += added
+        except OSError:
+            pass
+
+    #Helper method that writes a file atomically and returns how many bytes the cache grew by
+    def _write(self, path, data):
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return len(data) - replaced
+
+    #Deletes the least recently used entries until the cache takes at most max_bytes, or target bytes when given
+    def evict(self, target=None):
+        if target is None:
+            target = self.max_bytes
+        entries = {}
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            self._size = 0
+            return
+        for name in names:
+            key, extension = os.path.splitext(name)
+            if extension not in (".json", ".trace"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            size, used = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+            total += stat.st_size
+
+        for key, (size, _) in sorted(entries.items(), key=lambda entry: entry[1][1]):
+            if total <= target:
+                break
+            for extension in (".json", ".trace"):
+                try:
+                    os.unlink(self._path(key, extension))
+                except FileNotFoundError:
+                    pass
+            total -= size
+        self._size = total
+
+    #Deletes every entry of the cache
+    def clear(self):
+        self._size = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if os.path.splitext(name)[1] in (".json", ".trace"):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,440 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+from collections import deque
+from simulator import MemorySimulator
+from worker import SimulationWorker
+from events import LEVELS, RingBufferSink
+from workload import parse_entries
+
+#Local simulation server that streams the state of running simulations to any number of clients
+#The server owns the simulations, each stepped by its own SimulationWorker thread, and accepts requests and sends
+#updates as JSON objects, one per line, over a TCP socket bound to localhost only.
+#
+#Requests; a request with an "id" gets its reply with the same "id":
+#  {"op": "submit", "settings": {...}, "processes": [...]}   starts a simulation, replies {"type": "submitted", "run"}
+#      instead of "processes", "workload" may name a workload file on this machine, which is then streamed
+#      settings: total_memory (required), ch_interval, sc_interval, policy, compaction, event_driven,
+#      eager_coalescing, ticks_per_second (default: as fast as possible) and log ("debug", "info" or "off")
+#  {"op": "runs"}                                            replies {"type": "runs", "runs": [...]}
+#  {"op": "subscribe", "run": n} / {"op": "unsubscribe", "run": n}
+#  {"op": "pause" | "resume" | "step" | "stop", "run": n} and {"op": "speed", "run": n, "value": ticks_per_second}
+#      speed only applies to runs submitted with ticks_per_second; the others always run as fast as possible
+#
+#Updates of a subscribed run:
+#  {"type": "snapshot", ...} holds every memory block of the run, as [start, end, size, is_free, pid]
+#  {"type": "delta", ...} holds the blocks that changed since the previous update, the starts of the blocks that
+#      are gone, and the events logged since the previous update
+#  both hold the run, time, completed, rejected, num_processes, metrics, done and error, the message of the exception
+#      that ended a failed run (null otherwise); see apply_update
+#A subscriber first gets a snapshot and then deltas. Updates are never waited for: a subscriber that reads too slowly
+#to keep up is skipped, and gets a new snapshot of the latest state once it has caught up, so a slow client sees
+#fewer, coarser updates while the simulation and the other clients go on at full speed.
+#Once a run ends its simulation is released, and only the last KEEP_FINISHED ended runs stay listed.
+
+DEFAULT_PORT = 8765
+HOST = "127.0.0.1"
+#Seconds between two updates of a run
+UPDATE_INTERVAL = 0.05
+#Bytes waiting to be sent to a subscriber above which its updates are skipped, and below which it gets a
+#snapshot again
+HIGH_WATER = 1024 * 1024
+LOW_WATER = HIGH_WATER // 4
+#Longest message a client may send, which bounds the processes of one submission
+MAX_MESSAGE = 64 * 1024 * 1024
+#Events kept per run between two updates; older ones are dropped and counted in events_dropped
+EVENT_CAPACITY = 10000
+#Ended runs kept for runs and subscribe requests; older ones are forgotten
+KEEP_FINISHED = 32
+
+#Settings of a submission and the MemorySimulator arguments they become
+_SETTINGS = {
+    "ch_interval": 0, "sc_interval": 0, "policy": "first_fit", "compaction": "full", "event_driven": True,
+    "eager_coalescing": False,
+}
+
+#Defines one simulation of the server and the clients that follow it
+class _Run:
+    def __init__(self, run_id, sim, worker, events):
+        self.id = run_id
+        self.policy = sim.policy.name
+        self.total_memory = sim.total_memory_size
+        #The worker owns the simulation, and is dropped once the run ends
+        self.worker = worker
+        self.events = events
+        self.events_dropped = 0
+        self.snapshot = None
+        #Blocks of the last update, keyed by their start
+        self.blocks = {}
+        #Writer of every subscriber, mapped to whether it has the state of the last update
+        self.subscribers = {}
+        self.stopped = False
+
+    @property
+    def done(self):
+        return self.worker is None
+
+    #Returns the fields every update of the run holds
+    def _state(self):
+        snapshot = self.snapshot
+        return {
+            "run": self.id, "time": snapshot.timeline, "completed": snapshot.processes_completed,
+            "rejected": snapshot.processes_rejected, "num_processes": snapshot.num_processes,
+            "metrics": snapshot.metrics, "done": snapshot.done, "stopped": self.stopped, "error": snapshot.error,
+        }
+
+    #Returns the snapshot message of the last update
+    def snapshot_message(self):
+        return dict(self._state(), type="snapshot", blocks=list(self.blocks.values()))
+
+    #Takes a new snapshot from the worker and returns the delta message from the previous one
+    def advance(self, snapshot):
+        self.snapshot = snapshot
+        previous = self.blocks
+        self.blocks = {block[0]: block for block in snapshot.blocks}
+        changed = [block for block in snapshot.blocks if previous.get(block[0]) != block]
+        removed = [start for start in previous if start not in self.blocks]
+        events = self.events.drain_events()
+        dropped = self.events.dropped - self.events_dropped
+        self.events_dropped = self.events.dropped
+        return dict(self._state(), type="delta", blocks=changed, removed=removed,
+                    events=[event.as_dict() for event in events], events_dropped=dropped)
+
+    #Returns the summary of the run in the reply to a runs request
+    def summary(self):
+        summary = {"run": self.id, "subscribers": len(self.subscribers), "policy": self.policy,
+                   "total_memory": self.total_memory}
+        if self.snapshot is not None:
+            summary.update(time=self.snapshot.timeline, completed=self.snapshot.processes_completed,
+                           rejected=self.snapshot.processes_rejected, num_processes=self.snapshot.num_processes,
+                           error=self.snapshot.error)
+        summary.update(done=self.done, stopped=self.stopped)
+        return summary
+
+#Helper function that encodes one message as a line of JSON
+def _encode(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+#Function that applies an update to the blocks a client holds, keyed by their start, and returns them
+#Pass an empty dict before the first update; a snapshot replaces all blocks and a delta changes only some
+def apply_update(blocks, message):
+    if message["type"] == "snapshot":
+        blocks.clear()
+    for start in message.get("removed", ()):
+        blocks.pop(start, None)
+    for block in message["blocks"]:
+        blocks[block[0]] = block
+    return blocks
+
+class SimulationServer:
+    #Defines the constructor of the server; call serve to start accepting clients
+    def __init__(self, port=DEFAULT_PORT):
+        self.port = port
+        self.runs = {}
+        self._run_ids = itertools.count(1)
+        #Ids of the ended runs that are still kept, oldest first
+        self._finished = deque()
+        self._server = None
+
+    #Starts listening on localhost and returns once the socket is bound
+    #With port 0 the system picks a free port, which is stored in self.port
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_client, HOST, self.port, limit=MAX_MESSAGE)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    #Runs the server until it is cancelled, then stops every simulation
+    async def serve(self):
+        if self._server is None:
+            await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            for run in self.runs.values():
+                if run.worker is not None:
+                    run.worker.stop()
+
+    #Creates a simulation from the settings of a submission, starts it and returns its run
+    def submit(self, settings, processes):
+        if "total_memory" not in settings:
+            raise ValueError("The settings need a total_memory.")
+        arguments = {name: settings.get(name, default) for name, default in _SETTINGS.items()}
+        total_memory = int(settings["total_memory"])
+        if total_memory <= 0 or arguments["ch_interval"] < 0 or arguments["sc_interval"] < 0:
+            raise ValueError("Settings must be valid numbers (Memory > 0, Intervals >= 0).")
+        log = settings.get("log", "info")
+        if log not in LEVELS:
+            raise ValueError(f"Unknown log level {log!r}; choose from {', '.join(LEVELS)}.")
+        ticks_per_second = settings.get("ticks_per_second")
+        if ticks_per_second is not None and ticks_per_second <= 0:
+            raise ValueError("Ticks per second must be a number > 0.")
+
+        events = RingBufferSink(EVENT_CAPACITY, LEVELS[log])
+        sim = MemorySimulator(total_memory, arguments.pop("ch_interval"), arguments.pop("sc_interval"), processes,
+                              events, metrics=True, **arguments)
+        worker = SimulationWorker(sim, ticks_per_second or 1.0, snapshot_interval=UPDATE_INTERVAL)
+        if ticks_per_second is None:
+            worker.run_to_end()
+        run = _Run(next(self._run_ids), sim, worker, events)
+        self.runs[run.id] = run
+        worker.start()
+        asyncio.get_running_loop().create_task(self._follow(run))
+        return run
+
+    #Helper method that sends the new state of a run to its subscribers once per update interval until it ends
+    #A simulation that fails ends with a done update that holds the error, like one that completes
+    async def _follow(self, run):
+        while not run.done:
+            worker = run.worker
+            alive = worker.is_alive()
+            snapshot = None
+            while True:
+                try:
+                    snapshot = worker.snapshots.get_nowait()
+                except queue.Empty:
+                    break
+            if snapshot is not None:
+                self._broadcast(run, run.advance(snapshot))
+                if snapshot.done:
+                    self._finish(run)
+                    return
+            elif not alive:
+                #The worker ended without a last snapshot, so no update will ever say the run is done
+                self._stop(run, "The simulation ended without a final state.")
+                return
+            await asyncio.sleep(UPDATE_INTERVAL)
+
+    #Helper method that releases the simulation of a run that ended, and forgets the oldest ended runs
+    def _finish(self, run):
+        run.worker = None
+        self._finished.append(run.id)
+        while len(self._finished) > KEEP_FINISHED:
+            self.runs.pop(self._finished.popleft(), None)
+
+    #Helper method that stops a run and tells its subscribers, with the reason when it did not stop on request
+    def _stop(self, run, error=None):
+        run.worker.stop()
+        run.stopped = True
+        message = {"type": "stopped", "run": run.id}
+        if error is not None:
+            message["error"] = error
+        for subscriber in run.subscribers:
+            if not subscriber.is_closing():
+                subscriber.write(_encode(message))
+        self._finish(run)
+
+    #Helper method that sends an update to every subscriber of a run without waiting for any of them
+    #A subscriber with too much unsent data is skipped, and gets a snapshot again once most of it was sent.
+    #The last update of a run is sent to every subscriber, since no later update would bring it up to date
+    def _broadcast(self, run, delta):
+        snapshot = None
+        for writer, synced in list(run.subscribers.items()):
+            if writer.is_closing():
+                del run.subscribers[writer]
+                continue
+            buffered = writer.transport.get_write_buffer_size()
+            if buffered > HIGH_WATER or (not synced and buffered > LOW_WATER):
+                synced = False
+                if not delta["done"]:
+                    run.subscribers[writer] = False
+                    continue
+            if synced:
+                writer.write(_encode(delta))
+            else:
+                if snapshot is None:
+                    snapshot = _encode(run.snapshot_message())
+                writer.write(snapshot)
+                run.subscribers[writer] = True
+
+    #Helper method that adds a subscriber to a run and sends it the latest state, and whether the run was stopped
+    def _subscribe(self, run, writer):
+        run.subscribers[writer] = False
+        if run.snapshot is not None:
+            writer.write(_encode(run.snapshot_message()))
+            run.subscribers[writer] = True
+        if run.stopped:
+            writer.write(_encode({"type": "stopped", "run": run.id}))
+
+    #Helper method that returns the run a request names
+    def _get_run(self, request):
+        run = self.runs.get(request.get("run"))
+        if run is None:
+            raise ValueError(f"Unknown run {request.get('run')!r}.")
+        return run
+
+    #Helper method that carries out one request of a client and returns the reply, if any
+    def _handle(self, request, writer):
+        op = request.get("op")
+        if op == "submit":
+            if "workload" in request:
+                processes = request["workload"]
+            else:
+                processes = list(parse_entries(request.get("processes", ()), "processes"))
+            run = self.submit(request.get("settings", {}), processes)
+            return {"type": "submitted", "run": run.id}
+        if op == "runs":
+            return {"type": "runs", "runs": [run.summary() for run in self.runs.values()]}
+
+        run = self._get_run(request)
+        if op == "subscribe":
+            self._subscribe(run, writer)
+        elif op == "unsubscribe":
+            run.subscribers.pop(writer, None)
+        elif op not in ("pause", "resume", "step", "speed", "stop"):
+            raise ValueError(f"Unknown op {op!r}.")
+        elif run.done:
+            raise ValueError(f"Run {run.id} has ended.")
+        elif op == "pause" or op == "resume":
+            run.worker.set_paused(op == "pause")
+        elif op == "step":
+            run.worker.step_once()
+        elif op == "speed":
+            if request.get("value", 0) <= 0:
+                raise ValueError("Ticks per second must be a number > 0.")
+            run.worker.set_speed(request["value"])
+        else:
+            self._stop(run)
+        return {"type": "ok", "op": op, "run": run.id}
+
+    #Helper method that reads the requests of one client until it disconnects
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(_encode({"type": "error", "message": "Message too long."}))
+                    break
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object.")
+                    reply = self._handle(request, writer)
+                except (ValueError, TypeError, KeyError, OSError) as e:
+                    reply = {"type": "error", "message": str(e)}
+                if reply is not None:
+                    if isinstance(request, dict) and "id" in request:
+                        reply["id"] = request["id"]
+                    writer.write(_encode(reply))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for run in self.runs.values():
+                run.subscribers.pop(writer, None)
+            writer.close()
+
+#Function that sends one request to a server and returns its reply
+async def request(message, port=DEFAULT_PORT):
+    reader, writer = await asyncio.open_connection(HOST, port, limit=MAX_MESSAGE)
+    try:
+        writer.write(_encode(message))
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+#Function that subscribes to a run and yields every update until the run ends or is stopped
+async def watch(run, port=DEFAULT_PORT):
+    reader, writer = await asyncio.open_connection(HOST, port, limit=MAX_MESSAGE)
+    try:
+        writer.write(_encode({"op": "subscribe", "run": run}))
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message["type"] == "error":
+                raise ValueError(message["message"])
+            if message["type"] in ("snapshot", "delta", "stopped"):
+                yield message
+                if message["type"] == "stopped" or message["done"]:
+                    return
+    finally:
+        writer.close()
+
+#Helper function that prints one line per update of a watched run
+async def _print_updates(run, port, raw):
+    blocks = {}
+    async for message in watch(run, port):
+        if raw:
+            print(json.dumps(message), flush=True)
+            continue
+        if message["type"] == "stopped":
+            print(f"run {run} stopped" + (f": {message['error']}" if "error" in message else ""), flush=True)
+            continue
+        if message["error"] is not None:
+            print(f"run {run} failed at time {message['time']}: {message['error']}", flush=True)
+            continue
+        apply_update(blocks, message)
+        metrics = message["metrics"]
+        print(f"time {message['time']}: {message['completed']}/{message['num_processes']} completed, "
+              f"{message['rejected']} rejected, {len(blocks)} blocks, "
+              f"fragmentation {metrics['fragmentation']:.1%}, waiting {metrics['waiting']}", flush=True)
+
+#Helper function that builds the command line interface of the server and its client commands
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve memory allocation simulations to local clients.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port on localhost (default: {DEFAULT_PORT})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("serve", help="run the server")
+
+    submit_parser = subparsers.add_parser("submit", help="start a simulation on the server and print its run")
+    submit_parser.add_argument("workload", help="workload file (.json, .jsonl or .csv), read by the server")
+    submit_parser.add_argument("--memory", type=int, default=1000, help="total memory size (default: 1000)")
+    submit_parser.add_argument("--ch", type=int, default=0, help="coalescing interval, 0 disables it (default: 0)")
+    submit_parser.add_argument("--sc", type=int, default=0, help="compaction interval, 0 disables it (default: 0)")
+    submit_parser.add_argument("--policy", default="first_fit", help="allocation policy (default: first_fit)")
+    submit_parser.add_argument("--speed", type=float, help="ticks per second (default: as fast as possible)")
+
+    subparsers.add_parser("runs", help="list the simulations of the server")
+
+    watch_parser = subparsers.add_parser("watch", help="print the updates of a simulation until it ends")
+    watch_parser.add_argument("run", type=int, help="run to follow")
+    watch_parser.add_argument("--json", action="store_true", help="print the raw update messages")
+
+    for op in ("pause", "resume", "stop"):
+        subparsers.add_parser(op, help=f"{op} a simulation").add_argument("run", type=int)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            server = SimulationServer(args.port)
+            print(f"Serving simulations on {HOST}:{args.port}", file=sys.stderr)
+            asyncio.run(server.serve())
+        elif args.command == "watch":
+            asyncio.run(_print_updates(args.run, args.port, args.json))
+        else:
+            if args.command == "submit":
+                settings = {"total_memory": args.memory, "ch_interval": args.ch, "sc_interval": args.sc,
+                            "policy": args.policy, "ticks_per_second": args.speed}
+                message = {"op": "submit", "settings": settings, "workload": os.path.abspath(args.workload)}
+            elif args.command == "runs":
+                message = {"op": "runs"}
+            else:
+                message = {"op": args.command, "run": args.run}
+            reply = asyncio.run(request(message, args.port))
+            print(json.dumps(reply, indent=2))
+            if reply["type"] == "error":
+                sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    except ConnectionError as e:
+        print(f"Cannot reach the server on {HOST}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
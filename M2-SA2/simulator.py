@@ -1,161 +1,612 @@
+import heapq
+import itertools
+from bisect import bisect_left, insort
 from models import Process, MemoryBlock
+from workload import read_workload
+from metrics import SimulatorMetrics, PROFILED_OPERATIONS
+from allocation import get_allocation_policy
+from compaction import CompactionResult, get_compaction_strategy
+from events import (DEBUG, INFO, OFF, make_sink, TeeSink, TickStarted, AllocationAttempt, Allocated, Finished, Rejected,
+                    CoalesceStarted, CompactionStarted)
 
-#Defines the logic of the First-Fit memory allocation simulator and its relevant functions
+#Defines the logic of the memory allocation simulator and its relevant functions
 class MemorySimulator:
-    #Defines the constructor of the First-Fit simulator
-    def __init__(self, total_memory, ch_interval, sc_interval, process_inputs, logger_func):
+    #Defines the constructor of the simulator
+    #policy picks the allocation policy by name ("first_fit", "next_fit", "best_fit", "worst_fit" or "buddy") or instance
+    #With event_driven enabled, each step jumps straight to the next tick where something can happen
+    #With eager_coalescing enabled, a freed block is merged with its free neighbors right away
+    #compaction picks the Storage Compaction strategy by name ("full", "min_move" or "largest_holes") or instance
+    #logger_func receives the log lines, or the events themselves when it is an EventSink
+    #log_level filters the events below it out before they are built; events.OFF disables logging completely
+    #trace takes a recording.TraceRecorder that records the events of the run along with periodic checkpoints
+    #process_inputs is a list or iterator of {'size', 'burst', 'arrival'} entries ordered by arrival, or the path of a
+    #workload file; each process only enters the simulation once its arrival time is reached
+    #metrics turns on the profiling counters of metrics.SimulatorMetrics; without it nothing is measured
+    #state starts the simulation from a state returned by checkpoint instead of from time 0
+    def __init__(self, total_memory, ch_interval, sc_interval, process_inputs, logger_func, event_driven=False,
+                 eager_coalescing=False, compaction="full", policy="first_fit", log_level=DEBUG, trace=None,
+                 metrics=False, state=None):
         self.total_memory_size = total_memory
         self.ch_time = ch_interval
         self.sc_time = sc_interval
         self.process_inputs = process_inputs
+        #Processes given as a list stay in process_list and processes after they finish. Processes streamed from a
+        #file or an iterator are dropped once they finish, so memory use follows the number of live processes
+        self._listed = hasattr(process_inputs, "__len__") and not isinstance(process_inputs, str)
+        self.keep_history = self._listed
+        self.event_driven = event_driven
+        self.eager_coalescing = eager_coalescing
+        self.compaction = get_compaction_strategy(compaction)
+        self.policy = get_allocation_policy(policy)
 
-        self.logger = logger_func if logger_func else print
+        self.sink = make_sink(logger_func, log_level)
+        self.trace = trace
+        if trace is not None:
+            self.sink = TeeSink(self.sink, trace)
+            trace.start(self)
+        self.log_level = self.sink.level
 
-        self.memory_blocks = []
+        #First block of the address-ordered, doubly linked list of memory blocks
+        self.head = None
+        self.free_size = total_memory
         self.process_list = []
-        self.num_processes = len(self.process_inputs)
+        #Lookup maps and live process collections, so a tick only touches processes that are still active
+        self.processes = {}
+        self.block_by_pid = {}
+        self.running = {}
+        self.waiting = {}
+        #Pids of waiting processes whose Process object is shared with a fork and must be copied before it changes
+        self._shared = set()
+        #(size, pid) of every waiting process, so a tick only tries the ones that fit in the largest hole
+        self._waiting_by_size = []
+        #The total for a list of processes, and the number that arrived so far for a stream
+        self.num_processes = len(process_inputs) if self._listed else 0
         self.processes_completed = 0
+        self.processes_rejected = 0
+        self.processes_started = 0
+        #Sum over the started processes of the ticks they waited between arriving and being allocated
+        self.total_wait = 0
         self.timeline = 0
 
+        #Inputs that have not arrived yet, read one ahead so the next arrival time is known
+        #For a workload file, _next_position is where the next input starts in the file
+        self._inputs = None
+        self._next_input = None
+        self._next_position = None
+        self._last_arrival = 0
+        self._admitted = 0
+
+        #Work done by every compaction pass so far
+        self.compaction_bytes_moved = 0
+        self.compaction_blocks_moved = 0
+
+        #Min-heap of (completion time, pid) for running processes, so a step only touches the ones that finish
+        self._completions = []
+        #Set whenever memory may have changed since waiting processes last tried to allocate
+        self._retry_waiting = True
+
         self._initialize_memory()
-        self._initialize_processes()
+        if state is not None:
+            self.restore(state)
+        else:
+            self._initialize_processes()
+        if trace is not None:
+            trace.end_tick(self)
+        self.metrics = SimulatorMetrics(self) if metrics else None
 
-    #Helper method that creates the initial MemoryBlock
+    #Helper method that creates the initial MemoryBlock and hands it to the allocation policy
     def _initialize_memory(self):
         initial_block = MemoryBlock(0, self.total_memory_size - 1, self.total_memory_size)
-        self.memory_blocks.append(initial_block)
+        self.head = initial_block
+        self.policy.attach(self)
 
-    #Helper method that loops through the given inputs in a list and creates Process objects for each of them
+    #Helper method that starts reading the inputs and creates Process objects for the ones arriving at time 0
     def _initialize_processes(self):
-        for i, p_input in enumerate(self.process_inputs):
-            process = Process(pid=i+1, size=p_input['size'], burst_time=p_input['burst'])
-            self.process_list.append(process)
+        self._inputs = self._open_inputs()
+        self._read_next_input()
+        self._admit_arrivals()
+
+    #Helper method that returns a fresh iterator over the process inputs, starting after the first skip entries
+    #A list is indexed directly and a workload file is opened at the given position, so skipping costs nothing;
+    #a one-shot iterator can only be opened from the start
+    def _open_inputs(self, skip=0, position=None):
+        if isinstance(self.process_inputs, str):
+            return read_workload(self.process_inputs, position)
+        if self._listed:
+            return map(self.process_inputs.__getitem__, range(skip, len(self.process_inputs)))
+        return iter(self.process_inputs)
+
+    #Helper method that checks whether the inputs can be read again from any point, as a list or a workload file can
+    def _can_reopen(self):
+        return self._listed or isinstance(self.process_inputs, str)
+
+    #Helper method that reads the next input ahead, checking that arrival times never go back
+    def _read_next_input(self):
+        if isinstance(self.process_inputs, str):
+            self._next_position = self._inputs.position
+        self._next_input = next(self._inputs, None)
+        if self._next_input is not None:
+            arrival = self._next_input.get('arrival', 0)
+            if arrival < self._last_arrival:
+                raise ValueError(f"Process {self._admitted + 1} arrives at {arrival}, "
+                                 f"before the process listed before it ({self._last_arrival}).")
+            self._last_arrival = arrival
+
+    #Function that reads the inputs again after they ran out and admits the processes that already arrived
+    #For inputs that receive more processes while the simulation runs, like the pools of pools.PartitionedSimulator
+    def poll_inputs(self):
+        if self._next_input is None:
+            self._read_next_input()
+            self._admit_arrivals()
+
+    #Helper method that creates a Process for every input whose arrival time has been reached
+    def _admit_arrivals(self):
+        while self._next_input is not None and self._next_input.get('arrival', 0) <= self.timeline:
+            p_input = self._next_input
+            self._admitted += 1
+            process = Process(pid=self._admitted, size=p_input['size'], burst_time=p_input['burst'],
+                              arrival_time=p_input.get('arrival', 0))
+            if self.keep_history:
+                self.process_list.append(process)
+            if not self._listed:
+                self.num_processes += 1
+            self.processes[process.pid] = process
+            capacity = self.policy.capacity()
+            if self.policy.block_size_for(process.size) > capacity:
+                if capacity == self.total_memory_size:
+                    self._reject(process, f"size {process.size} exceeds the total memory of {self.total_memory_size}")
+                else:
+                    self._reject(process, f"size {process.size} does not fit the largest {self.policy.label} block of {capacity}")
+            else:
+                self.waiting[process.pid] = process
+                insort(self._waiting_by_size, (process.size, process.pid))
+            self._read_next_input()
+
+    #Helper method that marks a process as rejected, for requests that can never be allocated
+    def _reject(self, process, reason):
+        if process.pid in self._shared:
+            process = self._own(process)
+        process.is_rejected = True
+        self.processes_rejected += 1
+        if self.waiting.pop(process.pid, None) is not None:
+            self._remove_waiting_size(process)
+        if self.log_level <= INFO:
+            self.sink(Rejected(self.timeline, process.pid, reason))
+        if not self.keep_history:
+            del self.processes[process.pid]
+
+    #Helper method that drops a process from the size-ordered waiting index
+    def _remove_waiting_size(self, process):
+        i = bisect_left(self._waiting_by_size, (process.size, process.pid))
+        del self._waiting_by_size[i]
+
+    #Returns whether the simulation has no process left to arrive, run or allocate
+    def is_done(self):
+        return self._next_input is None and self.processes_completed + self.processes_rejected >= self._admitted
+
+    #Returns the state of the simulation as plain lists and numbers, for checkpoints
+    #Only the live processes are part of it, besides the counters, so its size follows the processes in memory and
+    #in the queue rather than the length of the run
+    def checkpoint(self):
+        return {
+            "timeline": self.timeline,
+            "completed": self.processes_completed,
+            "rejected": self.processes_rejected,
+            "bytes_moved": self.compaction_bytes_moved,
+            "blocks_moved": self.compaction_blocks_moved,
+            "retry_waiting": self._retry_waiting,
+            "admitted": self._admitted,
+            "num_processes": self.num_processes,
+            "started": self.processes_started,
+            "total_wait": self.total_wait,
+            "last_arrival": self._last_arrival,
+            "input_position": self._next_position,
+            "blocks": [(b.start, b.end, b.size, b.is_free, b.pid) for b in self.memory_blocks],
+            "processes": [
+                (p.pid, p.size, p.burst_time, p.arrival_time, p.start_time)
+                for p in itertools.chain(self.waiting.values(), self.running.values())
+            ],
+            "running": list(self.running),
+            "policy": self.policy.save_state(),
+        }
+
+    #Restores a state returned by checkpoint, on a simulator created with the same settings and processes
+    #Processes that had not arrived yet are read again from the inputs, so they must be a list or a workload file.
+    #Processes that finished before the checkpoint are not part of it, so from then on the simulation drops finished
+    #processes like a stream does, and process_list stays empty
+    def restore(self, state):
+        if not self._can_reopen():
+            raise ValueError("Only a simulation of a process list or a workload file can be restored.")
+        self.timeline = state["timeline"]
+        self.processes_completed = state["completed"]
+        self.processes_rejected = state["rejected"]
+        self.compaction_bytes_moved = state["bytes_moved"]
+        self.compaction_blocks_moved = state["blocks_moved"]
+        self._retry_waiting = state["retry_waiting"]
+
+        self.head = None
+        self.free_size = 0
+        self.block_by_pid = {}
+        last = None
+        for start, end, size, is_free, pid in state["blocks"]:
+            block = MemoryBlock(start, end, size, is_free, pid)
+            if last is None:
+                self.head = block
+            else:
+                self._link_after(last, block)
+            if is_free:
+                self.free_size += size
+            else:
+                self.block_by_pid[pid] = block
+            last = block
+        self.policy.attach(self)
+        self.policy.load_state(state["policy"])
+
+        self.keep_history = False
+        self.processes = {}
+        self.process_list = []
+        self.waiting = {}
+        self._waiting_by_size = []
+        self._shared = set()
+        running = set(state["running"])
+        for pid, size, burst_time, arrival_time, start_time in state["processes"]:
+            p = Process(pid, size, burst_time, arrival_time)
+            p.start_time = start_time
+            self.processes[pid] = p
+            if pid in running:
+                p.is_allocated = True
+                p.clock = self
+            else:
+                self.waiting[pid] = p
+                self._waiting_by_size.append((p.size, p.pid))
+        self._waiting_by_size.sort()
+
+        self._admitted = state["admitted"]
+        self.num_processes = state["num_processes"]
+        self.processes_started = state["started"]
+        self.total_wait = state["total_wait"]
+        self._last_arrival = state["last_arrival"]
+        self._inputs = self._open_inputs(self._admitted, state["input_position"])
+        self._read_next_input()
+
+        self.running = {pid: self.processes[pid] for pid in state["running"]}
+        self._completions = [(p.start_time + p.burst_time, pid) for pid, p in self.running.items()]
+        heapq.heapify(self._completions)
+
+    """
+    Function that returns an independent copy of the simulation in its current state, for what-if runs.
+    State is shared with the copy instead of copied wherever it can be: the process inputs, the compaction strategy
+    and every finished or rejected process never change again, and waiting processes are only copied once one of
+    the two simulations allocates or rejects them. The memory blocks, the hole index and the running processes are
+    copied. The copy logs to logger_func at log_level (off by default) and does not record a trace or metrics.
+    """
+    def fork(self, logger_func=None, log_level=OFF):
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        for name in PROFILED_OPERATIONS:
+            clone.__dict__.pop(name, None)
+        clone.metrics = None
+        clone.trace = None
+        clone.sink = make_sink(logger_func, log_level)
+        clone.log_level = clone.sink.level
+
+        #Running processes change every tick, so each simulation gets its own copies. Waiting processes stay shared
+        #until one of the simulations allocates or rejects them
+        clone.processes = dict(self.processes)
+        clone.running = {}
+        if self.keep_history:
+            clone.process_list = list(self.process_list)
+        for pid, p in self.running.items():
+            clone.running[pid] = clone.processes[pid] = p.copy()
+            clone.running[pid].clock = clone
+            if self.keep_history:
+                clone.process_list[pid - 1] = clone.running[pid]
+        clone.waiting = dict(self.waiting)
+        self._shared.update(self.waiting)
+        clone._shared = set(self._shared)
+        clone._waiting_by_size = list(self._waiting_by_size)
+        clone._completions = list(self._completions)
+
+        clone.head = None
+        clone.block_by_pid = {}
+        last = None
+        for block in self.memory_blocks:
+            new_block = MemoryBlock(block.start, block.end, block.size, block.is_free, block.pid)
+            if last is None:
+                clone.head = new_block
+            else:
+                clone._link_after(last, new_block)
+            if not block.is_free:
+                clone.block_by_pid[block.pid] = new_block
+            last = new_block
+        clone.policy = type(self.policy)()
+        clone.policy.attach(clone)
+        clone.policy.load_state(self.policy.save_state())
+
+        if self._can_reopen():
+            position = self._inputs.position if isinstance(self.process_inputs, str) else None
+            clone._inputs = clone._open_inputs(self._admitted + (self._next_input is not None), position)
+        else:
+            self._inputs, clone._inputs = itertools.tee(self._inputs)
+        return clone
+
+    #Helper method that replaces a waiting process shared with a fork by a copy owned by this simulation
+    def _own(self, process):
+        self._shared.discard(process.pid)
+        process = process.copy()
+        self.processes[process.pid] = process
+        self.waiting[process.pid] = process
+        if self.keep_history:
+            self.process_list[process.pid - 1] = process
+        return process
+
+    #Pickles the simulation as its settings and a checkpoint, so it can be sent to a process pool
+    #Logging, traces, metrics and finished processes are not pickled; the unpickled simulation runs with logging off
+    def __getstate__(self):
+        if not self._can_reopen():
+            raise TypeError("Only a simulation of a process list or a workload file can be pickled.")
+        settings = {
+            "total_memory": self.total_memory_size,
+            "ch_interval": self.ch_time,
+            "sc_interval": self.sc_time,
+            "process_inputs": self.process_inputs,
+            "event_driven": self.event_driven,
+            "eager_coalescing": self.eager_coalescing,
+            "compaction": self.compaction,
+        }
+        return {"settings": settings, "policy": type(self.policy), "state": self.checkpoint()}
 
-    #Helper method that searches a process in a list based on their pid value.
+    def __setstate__(self, data):
+        self.__init__(logger_func=None, policy=data["policy"](), log_level=OFF, state=data["state"],
+                      **data["settings"])
+
+    #Helper method that looks up a process based on their pid value.
     def _get_process_by_pid(self, pid):
-        for p in self.process_list:
-            if p.pid == pid:
-                return p
-        return None
-
-    #Helper method that sorts the list of memory blocks based on their start address
-    def _sort_blocks(self):
-        self.memory_blocks.sort(key=lambda block: block.start)
-
-    #Function that implements the First-Fit memory allocation algorithm
-    def first_fit(self, process):
-        self._sort_blocks()
-        
-        for i, block in enumerate(self.memory_blocks):
-            if block.is_free and block.size >= process.size:
-                if block.size > process.size:
-                    new_hole = MemoryBlock(
-                        start=block.start + process.size,
-                        end=block.end,
-                        size=block.size - process.size
-                    )
-                    self.memory_blocks.insert(i + 1, new_hole)
-                    block.end = block.start + process.size - 1
-                    block.size = process.size
-                
-                block.is_free = False
-                block.pid = process.pid
-                process.is_allocated = True
-                process.allocated_block_index = i
-                
-                self.logger(f"Time {self.timeline} - Allocated Process {process.pid} to Block [{block.start}-{block.end}]")
-                return True
-        return False
+        return self.processes.get(pid)
+
+    #Returns the memory blocks in address order, walking the linked list from the first block
+    @property
+    def memory_blocks(self):
+        blocks = []
+        block = self.head
+        while block is not None:
+            blocks.append(block)
+            block = block.next
+        return blocks
+
+    #Helper method that links a new block right after an existing one
+    def _link_after(self, block, new_block):
+        new_block.prev = block
+        new_block.next = block.next
+        if block.next is not None:
+            block.next.prev = new_block
+        block.next = new_block
+
+    #Helper method that merges the block following the given one into it and unlinks the absorbed block
+    def _absorb_next(self, block):
+        absorbed = block.next
+        block.end = absorbed.end
+        block.size += absorbed.size
+        block.next = absorbed.next
+        if absorbed.next is not None:
+            absorbed.next.prev = block
+        absorbed.prev = absorbed.next = None
+
+    #Function that allocates memory to a process using the configured allocation policy
+    #The policy finds a hole through its own index and carves the process's block out of it
+    def allocate(self, process):
+        block = self.policy.find(process.size)
+        if block is None:
+            return False
+        if process.pid in self._shared:
+            process = self._own(process)
+
+        block = self.policy.carve(block, process.size)
+        block.is_free = False
+        block.pid = process.pid
+        process.is_allocated = True
+        process.start_time = self.timeline
+        process.clock = self
+        self.processes_started += 1
+        self.total_wait += self.timeline - max(process.arrival_time, 1)
+        self.free_size -= block.size
+        self.block_by_pid[process.pid] = block
+        if self.waiting.pop(process.pid, None) is not None:
+            self._remove_waiting_size(process)
+        self.running[process.pid] = process
+        heapq.heappush(self._completions, (self.timeline + process.burst_time, process.pid))
+
+        if self.log_level <= INFO:
+            self.sink(Allocated(self.timeline, process.pid, block.start, block.end))
+        return True
 
     #Function that frees memory after a process is finished executing
     def free_memory(self, process):
-        block_to_free = None
-        for block in self.memory_blocks:
-            if not block.is_free and block.pid == process.pid:
-                block_to_free = block
-                break
-        
+        block_to_free = self.block_by_pid.pop(process.pid, None)
         if block_to_free is None: return
 
-        self.logger(f"Time {self.timeline} - Process {process.pid} FINISHED. Freed Block [{block_to_free.start}-{block_to_free.end}]")
+        if self.log_level <= INFO:
+            self.sink(Finished(self.timeline, process.pid, block_to_free.start, block_to_free.end))
         
         block_to_free.is_free = True
         block_to_free.pid = -1
+        self.free_size += block_to_free.size
+        self.policy.release(block_to_free)
         process.is_allocated = False
         process.is_finished = True
-        process.remaining_time = 0
+        process.finish_time = self.timeline
+        self.running.pop(process.pid, None)
         self.processes_completed += 1
+        if not self.keep_history:
+            del self.processes[process.pid]
+
+    #Returns the external fragmentation ratio, the share of free memory that lies outside the largest hole
+    def external_fragmentation(self):
+        if self.free_size == 0:
+            return 0.0
+        return 1 - self.policy.largest() / self.free_size
+
+    #Returns the current memory and queue statistics, plus the profiling counters when metrics are on
+    def metrics_snapshot(self):
+        snapshot = {
+            "time": self.timeline,
+            "completed": self.processes_completed,
+            "rejected": self.processes_rejected,
+            "running": len(self.running),
+            "waiting": len(self.waiting),
+            "free_memory": self.free_size,
+            "holes": len(self.policy),
+            "largest_hole": self.policy.largest(),
+            "fragmentation": round(self.external_fragmentation(), 4),
+            "average_wait": round(self.total_wait / self.processes_started, 4) if self.processes_started else 0.0,
+            "bytes_moved": self.compaction_bytes_moved,
+            "blocks_moved": self.compaction_blocks_moved,
+        }
+        if self.metrics is not None:
+            snapshot.update(self.metrics.snapshot())
+        return snapshot
+
+    #Helper method that merges a just-freed block with its free neighbors in constant time
+    #The merged hole keeps the lowest start address, which is the only one left in the hole index
+    def _merge_with_neighbors(self, block):
+        if block.prev is not None and block.prev.is_free:
+            block = block.prev
+            self._absorb_next(block)
+            was_indexed = True
+        else:
+            was_indexed = False
+
+        if block.next is not None and block.next.is_free:
+            self.policy.remove(block.next)
+            self._absorb_next(block)
+
+        if was_indexed:
+            self.policy.resize(block)
+        else:
+            self.policy.insert(block)
 
     #Function that implements the Coalescing Holes (CH) technique
+    #Policies that manage their own block layout, like the buddy system, already merge on free
     def coalesce(self):
-        self.logger("- Running Coalescing (CH)")
-        self._sort_blocks()
-        i = 0
-        while i < len(self.memory_blocks) - 1:
-            current = self.memory_blocks[i]
-            next_block = self.memory_blocks[i+1]
-            if current.is_free and next_block.is_free:
-                current.end = next_block.end
-                current.size = current.end - current.start + 1
-                self.memory_blocks.pop(i + 1)
-            else:
-                i += 1
+        if self.log_level <= INFO:
+            self.sink(CoalesceStarted(self.timeline))
+        if self.policy.fixed_layout:
+            return
+        current = self.head
+        while current is not None:
+            if current.is_free and current.next is not None and current.next.is_free:
+                while current.next is not None and current.next.is_free:
+                    self.policy.remove(current.next)
+                    self._absorb_next(current)
+                self.policy.resize(current)
+            current = current.next
 
-    #Function that implements the Storage Compaction (SC) technique.
+    #Function that implements the Storage Compaction (SC) technique using the configured strategy
+    #Returns the bytes and blocks the strategy moved
     def compact(self):
-        self.logger("- Running Compaction (SC)")
-        new_blocks_list = []
-        current_address = 0
-        
-        for block in self.memory_blocks:
-            if not block.is_free:
-                process = self._get_process_by_pid(block.pid)
-                old_start = block.start
-                block.start = current_address
-                block.end = block.start + block.size - 1
-                new_blocks_list.append(block)
-                if process:
-                    process.allocated_block_index = len(new_blocks_list) - 1
-                
-                self.logger(f"Compacted PID {block.pid}: Moved from {old_start} to {block.start}")
-                current_address = block.end + 1
-
-        if current_address < self.total_memory_size:
-            free_block = MemoryBlock(
-                start=current_address,
-                end=self.total_memory_size - 1,
-                size=self.total_memory_size - current_address
-            )
-            new_blocks_list.append(free_block)
-        self.memory_blocks = new_blocks_list
-
-    
+        if self.log_level <= INFO:
+            self.sink(CompactionStarted(self.timeline))
+        if self.policy.fixed_layout:
+            return CompactionResult(self.compaction.name)
+        result = self.compaction.compact(self)
+        self.compaction_bytes_moved += result.bytes_moved
+        self.compaction_blocks_moved += result.blocks_moved
+        return result
+
+    #Helper method that lets waiting processes try to allocate memory in pid order
+    #Only processes no larger than the largest hole are tried, and each is re-checked as earlier ones take memory
+    def _allocate_waiting(self):
+        largest = self.policy.largest()
+        candidates = []
+        for size, pid in self._waiting_by_size:
+            if size > largest:
+                break
+            candidates.append(pid)
+        candidates.sort()
+
+        for pid in candidates:
+            p = self.waiting[pid]
+            if self.policy.block_size_for(p.size) > self.policy.largest():
+                continue
+            if self.log_level <= DEBUG:
+                self.sink(AllocationAttempt(self.timeline, p.pid, p.size))
+            self.allocate(p)
+
+    #Helper method that checks whether the holes can still get bigger once no process is running
+    #Coalescing, compaction, eager merging or a policy that merges on free eventually turn free memory back into
+    #holes as large as the policy can provide
+    def _memory_can_grow(self):
+        return self.ch_time > 0 or self.sc_time > 0 or self.eager_coalescing or self.policy.fixed_layout
+
     """
-    Function that describes the events occuring in the first-fit algorithm simulation for each
+    Helper method that finds the next tick where the simulation state can change.
+    That is the earliest process completion or arrival, the next CH or SC interval boundary, or the very next tick
+    when memory changed after the waiting processes last tried to allocate.
+    Ticks in between only repeat allocation attempts that are known to fail, so they are skipped.
+    """
+    def _next_event_time(self):
+        if self._retry_waiting and self.waiting:
+            return self.timeline + 1
+
+        candidates = []
+        if self._completions:
+            candidates.append(self._completions[0][0])
+        if self.ch_time > 0:
+            candidates.append((self.timeline // self.ch_time + 1) * self.ch_time)
+        if self.sc_time > 0:
+            candidates.append((self.timeline // self.sc_time + 1) * self.sc_time)
+        if self._next_input is not None:
+            candidates.append(max(self._next_input.get('arrival', 0), self.timeline + 1))
+        if not candidates:
+            return self.timeline + 1
+        return min(candidates)
+
+    #Returns the time the next step advances the timeline to
+    def next_step_time(self):
+        return self._next_event_time() if self.event_driven else self.timeline + 1
+
+    #Moves the timeline forward to time when no step is due before it, so a run stopped at time ends on that tick in
+    #event-driven mode as it does in tick mode. The ticks skipped hold no event, and a finished simulation keeps the
+    #time it finished at
+    def skip_to(self, time):
+        if not self.is_done() and self.timeline < time < self.next_step_time():
+            self.timeline = time
+
+    """
+    Function that describes the events occuring in the memory allocation simulation for each
     second in the timeline
+    In event-driven mode a single call advances to the next event tick instead
     """
     def step(self):
-        if self.processes_completed >= self.num_processes:
+        if self.is_done():
             return False 
 
-        self.timeline += 1
-        self.logger(f"\n##### time = {self.timeline} #####")
+        self.timeline = self.next_step_time()
+        if self.log_level <= INFO:
+            self.sink(TickStarted(self.timeline))
 
-        for p in self.process_list:
-            if p.is_allocated and not p.is_finished:
-                p.remaining_time -= 1
-                if p.remaining_time == 0:
-                    self.free_memory(p)
+        #The heap pops processes finishing on the same tick in pid order, like the original scan of process_list
+        completions = self._completions
+        while completions and completions[0][0] <= self.timeline:
+            self.free_memory(self.running[heapq.heappop(completions)[1]])
 
-        for p in self.process_list:
-            if not p.is_allocated and not p.is_finished:
-                self.logger(f"Time {self.timeline}: Attempting to allocate Process {p.pid} (Size: {p.size})")
-                self.first_fit(p)
+        self._admit_arrivals()
+        self._allocate_waiting()
+        self._retry_waiting = False
         
         if self.ch_time > 0 and self.timeline % self.ch_time == 0:
             self.coalesce()
+            self._retry_waiting = True
             
         if self.sc_time > 0 and self.timeline % self.sc_time == 0:
             self.compact()
+            self._retry_waiting = True
+
+        if self.waiting and not self.running and not self._memory_can_grow():
+            for p in list(self.waiting.values()):
+                self._reject(p, "no hole is large enough and no running process or CH/SC can free more memory")
+
+        if self.trace is not None:
+            self.trace.end_tick(self)
             
         return True
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+#The simulator modules sit one directory up and import each other by their plain names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,38 @@
+import pytest
+from simulator import MemorySimulator
+
+#Tests of the admission of waiting processes: requests that can never be allocated are rejected instead of waiting
+#forever
+
+#Helper function that steps a simulation to its end and returns it, failing when it does not end
+def _run(sim, max_steps=1000):
+    for _ in range(max_steps):
+        if not sim.step():
+            return sim
+    pytest.fail("the simulation never ended")
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_process_larger_than_memory_is_rejected_on_arrival(event_driven):
+    logs = []
+    sim = MemorySimulator(100, 0, 0, [{'size': 150, 'burst': 3}, {'size': 40, 'burst': 2}], logs.append,
+                          event_driven=event_driven)
+    assert sim.process_list[0].is_rejected
+    _run(sim)
+    assert (sim.processes_completed, sim.processes_rejected, sim.timeline) == (1, 1, 3)
+    assert not sim.process_list[1].is_rejected
+    assert any("exceeds the total memory" in line for line in logs)
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_request_that_can_never_fit_is_rejected(event_driven):
+    #Both halves of memory are freed but never merged, so the last process never finds a hole of 80
+    processes = [{'size': 50, 'burst': 2}, {'size': 50, 'burst': 4}, {'size': 80, 'burst': 1}]
+    sim = _run(MemorySimulator(100, 0, 0, processes, lambda line: None, event_driven=event_driven))
+    assert [p.is_rejected for p in sim.process_list] == [False, False, True]
+    assert (sim.processes_completed, sim.processes_rejected, sim.timeline) == (2, 1, 5)
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_request_is_kept_waiting_while_coalescing_can_still_make_room(event_driven):
+    processes = [{'size': 50, 'burst': 2}, {'size': 50, 'burst': 4}, {'size': 80, 'burst': 1}]
+    sim = _run(MemorySimulator(100, 3, 0, processes, lambda line: None, event_driven=event_driven))
+    assert (sim.processes_completed, sim.processes_rejected) == (3, 0)
+    assert sim.process_list[2].start_time == 7
@@ -0,0 +1,51 @@
+import random
+import pytest
+from simulator import MemorySimulator
+
+#Tests of the allocation policies: the hole every policy finds through its index must be the one a plain scan of the
+#free blocks in address order picks
+
+#Helper functions that pick a hole for a request the naive way, from the free blocks in address order
+def _first_fit(holes, size, policy):
+    return next((hole for hole in holes if hole.size >= size), None)
+
+def _next_fit(holes, size, policy):
+    #The scan starts at the hole that holds the rover, or the first hole after it, and wraps around
+    first = next((i for i, hole in enumerate(holes) if hole.end >= policy.rover), len(holes))
+    return next((hole for hole in holes[first:] + holes[:first] if hole.size >= size), None)
+
+def _best_fit(holes, size, policy):
+    fitting = [hole for hole in holes if hole.size >= size]
+    return min(fitting, key=lambda hole: (hole.size, hole.start)) if fitting else None
+
+def _worst_fit(holes, size, policy):
+    largest = max(holes, key=lambda hole: (hole.size, -hole.start), default=None)
+    return largest if largest is not None and largest.size >= size else None
+
+NAIVE = {"first_fit": _first_fit, "next_fit": _next_fit, "best_fit": _best_fit, "worst_fit": _worst_fit}
+
+@pytest.mark.parametrize("policy", NAIVE)
+@pytest.mark.parametrize("seed", range(40))
+def test_policy_finds_the_hole_of_a_naive_scan(seed, policy):
+    rng = random.Random(seed)
+    memory = rng.choice([100, 1000])
+    processes = [{'size': rng.randint(1, memory // 3), 'burst': rng.randint(1, 15)}
+                 for _ in range(rng.randint(10, 80))]
+    sim = MemorySimulator(memory, rng.choice([0, 4]), rng.choice([0, 9]), processes, lambda line: None,
+                          eager_coalescing=rng.random() < 0.5, policy=policy)
+    find = sim.policy.find
+    naive = NAIVE[policy]
+    lookups = []
+
+    def checked_find(size):
+        holes = [block for block in sim.memory_blocks if block.is_free]
+        expected = naive(holes, size, sim.policy)
+        block = find(size)
+        assert block is expected
+        lookups.append(block)
+        return block
+
+    sim.policy.find = checked_find
+    while sim.step():
+        pass
+    assert any(block is not None for block in lookups)
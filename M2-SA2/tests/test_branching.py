@@ -0,0 +1,71 @@
+import pickle
+import random
+import pytest
+from simulator import MemorySimulator
+from events import OFF
+from branching import continue_run, run_branches
+
+#Tests of forked and pickled simulations: a simulation continued from any point must end exactly like one that was
+#never interrupted
+
+#Helper function that returns the settings and processes of a random case, with arrivals spread over time
+def _case(seed):
+    rng = random.Random(seed)
+    memory = rng.choice([100, 1000])
+    settings = dict(event_driven=rng.random() < 0.5, eager_coalescing=rng.random() < 0.3,
+                    policy=rng.choice(["first_fit", "next_fit", "best_fit", "worst_fit"]))
+    processes = [{'size': rng.randint(1, memory // 2), 'burst': rng.randint(1, 40), 'arrival': i // 3}
+                 for i in range(rng.randint(5, 60))]
+    return memory, rng.choice([0, 3, 7]), rng.choice([0, 5, 11]), processes, settings
+
+#Helper function that returns the observable state of a simulation
+def _state(sim):
+    return (sim.timeline, sim.processes_completed, sim.processes_rejected, sim.total_wait, sim.compaction_bytes_moved,
+            [(b.start, b.end, b.size, b.is_free, b.pid) for b in sim.memory_blocks])
+
+#Helper function that steps a simulation to its end and returns its state
+def _finish(sim):
+    while sim.step():
+        pass
+    return _state(sim)
+
+#Helper function that creates a simulation of a case and steps it the given number of times
+def _started(seed, steps):
+    memory, ch, sc, processes, settings = _case(seed)
+    sim = MemorySimulator(memory, ch, sc, processes, None, log_level=OFF, **settings)
+    for _ in range(steps):
+        sim.step()
+    return sim
+
+@pytest.mark.parametrize("seed", range(30))
+def test_fork_continues_like_an_uninterrupted_run(seed):
+    expected = _finish(_started(seed, 0))
+    sim = _started(seed, seed % 13)
+    fork = sim.fork()
+    assert _finish(fork) == expected
+    assert _finish(sim) == expected
+
+@pytest.mark.parametrize("seed", range(30))
+def test_pickled_simulation_continues_like_an_uninterrupted_run(seed):
+    expected = _finish(_started(seed, 0))
+    sim = _started(seed, seed % 13)
+    assert _finish(pickle.loads(pickle.dumps(sim))) == expected
+
+@pytest.mark.parametrize("seed", range(10))
+def test_branches_stop_at_max_time_in_either_time_mode(seed):
+    memory, ch, sc, processes, settings = _case(seed)
+    for p in processes:
+        p['burst'] *= 50
+    results = []
+    for event_driven in (True, False):
+        settings["event_driven"] = event_driven
+        sim = MemorySimulator(memory, ch, sc, processes, None, log_level=OFF, **settings)
+        results.append(run_branches(sim, [{"max_time": 60}, {"max_time": 200, "actions": ["compact"]}], jobs=1))
+    assert results[0] == results[1]
+    assert [result["time"] for result in results[0]] == [60, 200]
+
+def test_continue_run_applies_the_variant():
+    sim = _started(3, 5)
+    result = continue_run(sim.fork(), {"sc_interval": 1})
+    assert result["variant"] == {"sc_interval": 1}
+    assert result["completed"] + result["rejected"] == sim.num_processes
@@ -0,0 +1,58 @@
+import random
+import pytest
+from simulator import MemorySimulator
+
+#Tests of the compaction strategies
+
+#Helper function that returns the fewest bytes any run of blocks must move for a hole of the needed size
+#Sliding a run down moves every allocated block after the first hole of the run; the free blocks right outside a run
+#are always taken into it, since they cost nothing
+def _fewest_bytes(blocks, needed):
+    best = None
+    for i in range(len(blocks)):
+        for j in range(i, len(blocks)):
+            first, last = i, j
+            while first > 0 and blocks[first - 1].is_free:
+                first -= 1
+            while last + 1 < len(blocks) and blocks[last + 1].is_free:
+                last += 1
+            run = blocks[first:last + 1]
+            if sum(b.size for b in run if b.is_free) < needed:
+                continue
+            holes_before = False
+            moved = 0
+            for b in run:
+                if b.is_free:
+                    holes_before = True
+                elif holes_before:
+                    moved += b.size
+            if best is None or moved < best:
+                best = moved
+    return best
+
+#Helper function that steps a simulation until the first waiting process only fits once memory is compacted,
+#and returns whether it got there
+def _step_to_fragmented(sim):
+    for _ in range(200):
+        head = next(iter(sim.waiting.values()), None)
+        largest = max((b.size for b in sim.memory_blocks if b.is_free), default=0)
+        if head is not None and largest < head.size <= sim.free_size:
+            return True
+        if not sim.step():
+            return False
+    return False
+
+@pytest.mark.parametrize("seed", range(200))
+def test_min_move_moves_the_fewest_bytes(seed):
+    rng = random.Random(seed)
+    memory = rng.choice([100, 400])
+    processes = [{'size': rng.randint(1, memory // 4), 'burst': rng.randint(1, 20)} for _ in range(rng.randint(10, 60))]
+    sim = MemorySimulator(memory, 0, 0, processes, lambda line: None, compaction="min_move")
+    if not _step_to_fragmented(sim):
+        pytest.skip("memory never gets fragmented on this case")
+    needed = next(iter(sim.waiting.values())).size
+    expected = _fewest_bytes(sim.memory_blocks, needed)
+    moved_before = sim.compaction_bytes_moved
+    sim.compact()
+    assert sim.compaction_bytes_moved - moved_before == expected
+    assert max(b.size for b in sim.memory_blocks if b.is_free) >= needed
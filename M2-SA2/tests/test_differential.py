@@ -0,0 +1,119 @@
+import random
+import pytest
+from simulator import MemorySimulator
+import reference_simulator
+
+#Differential tests: the optimized engines must reproduce the original simulator exactly
+#Every test runs the same random workloads through two engines and compares the logs, the timeline and the final
+#block layout. The seeds are fixed, so a failure names a case that can be run again on its own.
+
+SEEDS = range(120)
+#Ticks after which a run is given up; the reference never ends when a process can never fit
+MAX_STEPS = 3000
+
+#Helper function that returns the memory size, CH and SC intervals and processes of a random case
+def _case(seed, arrivals=False):
+    rng = random.Random(seed)
+    memory = rng.choice([50, 100, 1000])
+    ch = rng.choice([0, 0, 1, 3, 7])
+    sc = rng.choice([0, 0, 2, 5, 11])
+    processes = [{'size': rng.randint(1, memory), 'burst': rng.randint(1, 12)} for _ in range(rng.randint(1, 30))]
+    if arrivals:
+        spread = rng.choice([1, 3, 20])
+        for i, p in enumerate(processes):
+            p['arrival'] = i // spread
+    return memory, ch, sc, processes
+
+#Helper function that steps a simulation to its end and returns its log, final time and blocks, or None when it
+#does not end within max_steps
+def _run(sim, logs, max_steps=MAX_STEPS):
+    for _ in range(max_steps):
+        if not sim.step():
+            blocks = [(b.start, b.end, b.size, b.is_free, b.pid) for b in sorted(sim.memory_blocks, key=lambda b: b.start)]
+            return logs, sim.timeline, blocks
+    return None
+
+#Helper function that drops the allocation attempts from a log
+#MemorySimulator only tries the processes that fit in the largest hole, so it logs fewer attempts than the reference
+def _without_attempts(logs):
+    return [line for line in logs if "Attempting" not in line]
+
+#Helper function that splits a log into the lines of every tick, keyed by the tick header
+def _ticks(logs):
+    ticks = {}
+    current = ticks.setdefault("", [])
+    for line in logs:
+        if line.startswith("\n##### time"):
+            current = ticks.setdefault(line, [])
+        else:
+            current.append(line)
+    return ticks
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_tick_mode_matches_reference(seed):
+    memory, ch, sc, processes = _case(seed)
+    reference_logs = []
+    expected = _run(reference_simulator.MemorySimulator(memory, ch, sc, processes, reference_logs.append),
+                    reference_logs)
+    if expected is None:
+        pytest.skip("the reference never ends on this case")
+    logs = []
+    result = _run(MemorySimulator(memory, ch, sc, processes, logs.append), logs)
+    assert result is not None
+    assert _without_attempts(result[0]) == _without_attempts(expected[0])
+    assert result[1:] == expected[1:]
+
+@pytest.mark.parametrize("seed", range(40))
+def test_remaining_time_counts_down_like_reference(seed):
+    memory, ch, sc, processes = _case(seed)
+    reference = reference_simulator.MemorySimulator(memory, ch, sc, processes, lambda line: None)
+    sim = MemorySimulator(memory, ch, sc, processes, lambda line: None)
+    for _ in range(100):
+        reference.step()
+        sim.step()
+        assert [p.remaining_time for p in sim.process_list] == [p.remaining_time for p in reference.process_list]
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_event_mode_matches_tick_mode(seed):
+    memory, ch, sc, processes = _case(seed, arrivals=seed % 2 == 1)
+    rng = random.Random(seed)
+    for p in processes:
+        p['burst'] *= rng.choice([1, 1, 10, 100])
+    tick_logs, event_logs = [], []
+    expected = _run(MemorySimulator(memory, ch, sc, processes, tick_logs.append), tick_logs, 10 * MAX_STEPS)
+    if expected is None:
+        pytest.skip("tick mode does not end within the step limit on this case")
+    result = _run(MemorySimulator(memory, ch, sc, processes, event_logs.append, event_driven=True), event_logs,
+                  10 * MAX_STEPS)
+    assert result is not None
+    assert result[1:] == expected[1:]
+
+    #Every tick event mode stops at logs the same lines, and the ticks it skips only held failed attempts
+    tick_mode, event_mode = _ticks(expected[0]), _ticks(result[0])
+    for header, lines in tick_mode.items():
+        if header in event_mode:
+            assert event_mode[header] == lines
+        else:
+            assert _without_attempts(lines) == []
+    assert set(event_mode) <= set(tick_mode)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_vectorized_engine_matches_simulator(seed):
+    pytest.importorskip("numpy")
+    from vector_engine import VectorizedSimulator
+
+    rng = random.Random(seed)
+    base, _, _, processes = _case(seed)
+    configs = [(rng.choice([base // 2, base, base * 2, base + 7]), rng.choice([0, 1, 3, 7]), rng.choice([0, 2, 5, 11]))
+               for _ in range(8)]
+    vector = VectorizedSimulator([c[0] for c in configs], [c[1] for c in configs], [c[2] for c in configs], processes)
+    vector.run(max_time=MAX_STEPS)
+    for replica, (memory, ch, sc) in enumerate(configs):
+        sim = MemorySimulator(memory, ch, sc, processes, lambda line: None)
+        while sim.timeline < MAX_STEPS and sim.step():
+            pass
+        assert vector.timeline[replica] == sim.timeline
+        assert vector.blocks(replica) == [(b.start, b.end, b.size, b.is_free, b.pid) for b in sim.memory_blocks]
+        assert list(vector.start_time[replica]) == [p.start_time for p in sim.process_list]
+        assert list(vector.finish_time[replica]) == [p.finish_time for p in sim.process_list]
+        assert list(vector.state[replica] == 3) == [p.is_rejected for p in sim.process_list]
@@ -0,0 +1,28 @@
+import random
+import pytest
+from headless import run_simulation
+
+#Tests of the headless batch runner
+
+#Helper function that returns a random workload with bursts long enough for event-driven runs to skip many ticks
+def _processes(seed, memory):
+    rng = random.Random(seed)
+    return [{'size': rng.randint(1, memory), 'burst': rng.choice([1, 3, 50, 400, 5000])} for _ in range(rng.randint(1, 20))]
+
+def test_max_time_stops_event_mode_at_the_limit():
+    processes = [{'size': 10, 'burst': 5000}, {'size': 10, 'burst': 3}]
+    event_mode = run_simulation(100, 0, 0, processes, event_driven=True, max_time=100)
+    tick_mode = run_simulation(100, 0, 0, processes, event_driven=False, max_time=100)
+    assert (event_mode["makespan"], event_mode["completed"]) == (100, 1)
+    assert event_mode == tick_mode
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("max_time", [1, 7, 100, 1000, None])
+def test_event_mode_stops_at_the_same_time_as_tick_mode(seed, max_time):
+    memory = random.Random(seed).choice([50, 100, 1000])
+    #Compaction always runs eventually, so a run without a limit cannot stall on holes that never merge
+    ch, sc = seed % 3, seed % 5 + 1
+    processes = _processes(seed, memory)
+    event_mode = run_simulation(memory, ch, sc, processes, event_driven=True, max_time=max_time)
+    tick_mode = run_simulation(memory, ch, sc, processes, event_driven=False, max_time=max_time)
+    assert event_mode == tick_mode
@@ -0,0 +1,49 @@
+import random
+import pytest
+from simulator import MemorySimulator
+from events import OFF
+from pools import PartitionedSimulator, PLACEMENT_POLICIES
+from workload import generate_workload
+
+#Tests of partitioned memory: a single pool must reproduce MemorySimulator exactly, whatever the placement policy
+
+@pytest.mark.parametrize("placement", PLACEMENT_POLICIES)
+@pytest.mark.parametrize("seed", range(30))
+def test_single_pool_matches_simulator(seed, placement):
+    rng = random.Random(seed)
+    memory = rng.randint(200, 3000)
+    ch, sc = rng.choice([0, 0, 3, 7]), rng.choice([0, 0, 5, 11])
+    settings = dict(event_driven=rng.random() < 0.6,
+                    policy=rng.choice(["first_fit", "next_fit", "best_fit", "worst_fit", "buddy"]))
+    processes = list(generate_workload(rng.randint(1, 200), seed, (1, memory // rng.choice([2, 4, 10]) + 1), (1, 30),
+                                       rng.choice([None, 1, 3, 10])))
+    if rng.random() < 0.5:
+        gap = rng.choice([5, 40])
+        processes = [dict(p, arrival=p['arrival'] * gap) for p in processes]
+
+    sim = MemorySimulator(memory, ch, sc, processes, None, log_level=OFF, **settings)
+    peak = 0.0
+    while sim.step():
+        peak = max(peak, sim.external_fragmentation())
+    expected = sim.metrics_snapshot()
+
+    pools = PartitionedSimulator([memory], ch, sc, processes, placement=placement, **settings)
+    result = pools.run()
+    assert (result["time"], result["completed"], result["rejected"], result["average_wait"], result["bytes_moved"]) == \
+        (sim.timeline, expected["completed"], expected["rejected"], expected["average_wait"], expected["bytes_moved"])
+    assert result["peak_fragmentation"] == round(peak, 4)
+    assert pools.blocks() == [(b.start, b.end, b.size, b.is_free, b.pid) for b in sim.memory_blocks]
+
+@pytest.mark.parametrize("pools", [1, 3])
+@pytest.mark.parametrize("seed", range(10))
+def test_event_mode_stops_at_max_time_like_tick_mode(seed, pools):
+    rng = random.Random(seed)
+    processes = list(generate_workload(60, seed, (1, 300), (1, 2000), rng.choice([1, 3])))
+    results = []
+    for event_driven in (True, False):
+        with PartitionedSimulator([1000] * pools, 0, 7, processes, workers=1, event_driven=event_driven) as sim:
+            result = sim.run(max_time=150)
+            results.append((result["time"], result["completed"], result["rejected"], result["running"],
+                            result["waiting"], sim.blocks()))
+    assert results[0] == results[1]
+    assert results[0][0] == 150
@@ -0,0 +1,61 @@
+import random
+import pytest
+from simulator import MemorySimulator
+from events import OFF
+from recording import TraceRecorder, Replay
+
+#Tests of trace recording and replay: jumping to any tick of a trace must give the state a run stopped at that tick has
+
+#Helper function that returns the settings and processes of a random case
+def _case(seed):
+    rng = random.Random(seed)
+    memory = rng.choice([100, 1000])
+    settings = dict(event_driven=rng.random() < 0.5, eager_coalescing=rng.random() < 0.3,
+                    policy=rng.choice(["first_fit", "next_fit", "best_fit", "worst_fit", "buddy"]),
+                    compaction=rng.choice(["full", "min_move", "largest_holes"]))
+    processes = [{'size': rng.randint(1, memory // 2), 'burst': rng.randint(1, 30), 'arrival': i // 2}
+                 for i in range(rng.randint(5, 80))]
+    return memory, rng.choice([0, 3, 7]), rng.choice([0, 5, 11]), processes, settings
+
+#Helper function that returns the observable state of a simulation
+def _state(sim):
+    return (sim.timeline, sim.processes_completed, sim.processes_rejected, sorted(sim.running), sorted(sim.waiting),
+            [(b.start, b.end, b.size, b.is_free, b.pid) for b in sim.memory_blocks])
+
+#Helper function that records a whole run of a case and returns the trace
+def _record(seed, checkpoint_interval):
+    memory, ch, sc, processes, settings = _case(seed)
+    recorder = TraceRecorder(checkpoint_interval=checkpoint_interval)
+    sim = MemorySimulator(memory, ch, sc, processes, None, log_level=OFF, trace=recorder, **settings)
+    while sim.step():
+        pass
+    return recorder.getvalue()
+
+@pytest.mark.parametrize("seed", range(20))
+def test_seek_matches_a_run_stopped_at_that_time(seed):
+    replay = Replay(_record(seed, 10))
+    memory, ch, sc, processes, settings = _case(seed)
+    sim = MemorySimulator(memory, ch, sc, processes, None, log_level=OFF, **settings)
+    for time in range(replay.end_time + 1):
+        while not sim.is_done() and sim.next_step_time() <= time:
+            sim.step()
+        assert _state(replay.seek(time)) == _state(sim)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_events_of_a_range_match_the_whole_trace(seed):
+    replay = Replay(_record(seed, 25))
+    every_event = replay.events()
+    for start, end in [(0, 5), (3, 3), (7, 40), (replay.end_time, None)]:
+        assert [event.message() for event in replay.events(start, end)] == \
+            [event.message() for event in every_event if event.time >= start and (end is None or event.time <= end)]
+
+@pytest.mark.parametrize("seed", range(10))
+def test_extended_replay_matches_one_built_from_the_whole_trace(seed):
+    data = _record(seed, 10)
+    whole = Replay(data)
+    cut = len(data) // 3
+    grown = Replay(data[:cut])
+    for end in (cut + 1, cut + 2, 2 * cut + 5, len(data)):
+        grown.extend(data[len(grown.data):end])
+    assert (grown.checkpoints, grown.ticks, grown.end_time) == (whole.checkpoints, whole.ticks, whole.end_time)
+    assert _state(grown.seek(grown.end_time)) == _state(whole.seek(whole.end_time))
@@ -0,0 +1,55 @@
+import os
+import time
+from result_cache import ResultCache, workload_digest
+from recording import TraceRecorder, trace_config
+from headless import run_simulation
+
+#Tests of the persistent result cache
+
+PROCESSES = [{'size': 30, 'burst': 4}, {'size': 50, 'burst': 2, 'arrival': 3}, {'size': 80, 'burst': 5, 'arrival': 4}]
+
+#Helper function that sets the time an entry was last used, so eviction order does not depend on the clock resolution
+def _touch(cache, key, used):
+    for extension in (".json", ".trace"):
+        path = os.path.join(cache.directory, key + extension)
+        if os.path.exists(path):
+            os.utime(path, (used, used))
+
+def test_get_returns_what_put_stored(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("summary", {"total_memory": 100}, workload_digest(PROCESSES))
+    assert cache.get(key) is None
+    cache.put(key, {"makespan": 9}, b"trace")
+    assert cache.get(key) == {"makespan": 9}
+    assert cache.get_trace(key) == b"trace"
+    assert cache.key("summary", {"total_memory": 200}, workload_digest(PROCESSES)) != key
+
+def test_eviction_drops_the_least_recently_used_entries(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=1000)
+    now = time.time()
+    keys = [cache.key("summary", {"run": i}, "digest") for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, {"padding": "x" * 280})
+        _touch(cache, key, now - 100 + i)
+    #Reading the oldest entry makes it the most recently used one
+    assert cache.get(keys[0]) is not None
+    _touch(cache, keys[0], now)
+
+    cache.put(keys[3], {"padding": "x" * 280})
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+    assert sum(os.path.getsize(os.path.join(cache.directory, name)) for name in os.listdir(cache.directory)) <= 1000
+
+def test_cached_trace_is_only_reused_with_the_same_checkpoint_interval(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = TraceRecorder(checkpoint_interval=2)
+    expected = run_simulation(200, 0, 0, PROCESSES, trace=first, cache=cache)
+    assert trace_config(first.getvalue())["checkpoint_interval"] == 2
+
+    same = TraceRecorder(checkpoint_interval=2)
+    assert run_simulation(200, 0, 0, PROCESSES, trace=same, cache=cache) == expected
+    assert same.getvalue() == first.getvalue()
+
+    other = TraceRecorder(checkpoint_interval=3)
+    assert run_simulation(200, 0, 0, PROCESSES, trace=other, cache=cache) == expected
+    assert trace_config(other.getvalue())["checkpoint_interval"] == 3
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import random
+import pytest
+from simulator import MemorySimulator
+from worker import SimulationSnapshot
+from events import OFF, RingBufferSink
+from server import SimulationServer, _Run, apply_update, request, watch
+
+#Tests of the simulation server: a client that applies the updates of a run must hold the same blocks as the run
+
+#Helper function that returns random processes arriving over time
+def _processes(seed, count=200):
+    rng = random.Random(seed)
+    return [{'size': rng.randint(10, 300), 'burst': rng.randint(1, 30), 'arrival': i // 5} for i in range(count)]
+
+#Helper function that returns the blocks of a simulation the way updates hold them
+def _blocks(sim):
+    return [[b.start, b.end, b.size, b.is_free, b.pid] for b in sim.memory_blocks]
+
+@pytest.mark.parametrize("seed", range(10))
+def test_deltas_rebuild_the_blocks_of_every_update(seed):
+    rng = random.Random(seed)
+    sim = MemorySimulator(2000, rng.choice([0, 5]), rng.choice([0, 20]), _processes(seed), None, log_level=OFF,
+                          policy=rng.choice(["first_fit", "best_fit", "buddy"]))
+    run = _Run(1, sim, None, RingBufferSink(100))
+    run.advance(SimulationSnapshot(sim, False))
+    blocks = apply_update({}, json.loads(json.dumps(run.snapshot_message())))
+    while sim.step():
+        #Updates skip ticks, like a worker that publishes snapshots at its own pace
+        if rng.random() < 0.5:
+            message = json.loads(json.dumps(run.advance(SimulationSnapshot(sim, sim.is_done()))))
+            apply_update(blocks, message)
+            assert sorted(blocks.values()) == _blocks(sim)
+
+#Helper function that starts a server on a free port, runs the given coroutine against it and stops the server
+def _with_server(test):
+    async def main():
+        server = SimulationServer(0)
+        await server.start()
+        serving = asyncio.create_task(server.serve())
+        try:
+            return await test(server.port)
+        finally:
+            serving.cancel()
+    return asyncio.run(main())
+
+def test_subscribers_end_with_the_blocks_of_the_finished_run():
+    processes = _processes(1, 3000)
+    settings = {"total_memory": 3000, "ch_interval": 5, "sc_interval": 20}
+
+    async def test(port):
+        reply = await request({"op": "submit", "id": 3, "settings": settings, "processes": processes}, port)
+        assert reply["type"] == "submitted" and reply["id"] == 3
+
+        async def follow():
+            blocks = {}
+            last = None
+            async for message in watch(reply["run"], port):
+                apply_update(blocks, message)
+                last = message
+            return blocks, last
+        return await asyncio.gather(follow(), follow())
+
+    sim = MemorySimulator(3000, 5, 20, processes, None, event_driven=True, log_level=OFF)
+    while sim.step():
+        pass
+    for blocks, last in _with_server(test):
+        assert last["done"] and last["error"] is None
+        assert (last["time"], last["completed"]) == (sim.timeline, sim.processes_completed)
+        assert sorted(blocks.values()) == _blocks(sim)
+
+def test_bad_requests_get_an_error_reply():
+    async def test(port):
+        return [
+            await request({"op": "submit", "settings": {"total_memory": 0}, "processes": []}, port),
+            await request({"op": "submit", "settings": {"total_memory": 10}, "processes": [{"size": -1, "burst": 1}]},
+                          port),
+            await request({"op": "subscribe", "run": 99}, port),
+            await request({"op": "launch"}, port),
+        ]
+    assert [reply["type"] for reply in _with_server(test)] == ["error"] * 4
@@ -0,0 +1,66 @@
+import itertools
+import json
+import random
+import pytest
+from workload import read_workload
+
+#Tests of the workload readers
+
+#Helper function that returns random processes ordered by arrival
+def _processes(seed, count=40):
+    rng = random.Random(seed)
+    return [{'size': rng.randint(1, 500), 'burst': rng.randint(1, 50), 'arrival': i // 3} for i in range(count)]
+
+#Helper functions that write processes as a workload file of every format, with blank lines where the format allows
+def _write_csv(path, processes):
+    lines = ["size,burst,arrival"]
+    for i, p in enumerate(processes):
+        lines.append(f"{p['size']},{p['burst']},{p['arrival']}")
+        if i % 7 == 3:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n")
+
+def _write_jsonl(path, processes):
+    lines = []
+    for i, p in enumerate(processes):
+        lines.append(json.dumps(p))
+        if i % 5 == 2:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n")
+
+def _write_json(path, processes):
+    path.write_text(json.dumps(processes))
+
+WRITERS = {".csv": _write_csv, ".jsonl": _write_jsonl, ".json": _write_json}
+
+@pytest.mark.parametrize("extension", WRITERS)
+def test_reader_yields_every_process(tmp_path, extension):
+    processes = _processes(0)
+    path = tmp_path / ("workload" + extension)
+    WRITERS[extension](path, processes)
+    assert list(read_workload(str(path))) == processes
+
+@pytest.mark.parametrize("extension", WRITERS)
+@pytest.mark.parametrize("stop", [0, 1, 4, 17, 39, 40])
+def test_reader_resumes_from_a_saved_position(tmp_path, extension, stop):
+    processes = _processes(stop)
+    path = tmp_path / ("workload" + extension)
+    WRITERS[extension](path, processes)
+    reader = read_workload(str(path))
+    assert list(itertools.islice(reader, stop)) == processes[:stop]
+    position = reader.position
+    assert list(read_workload(str(path), position)) == processes[stop:]
+    assert list(reader) == processes[stop:]
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl"])
+def test_resumed_reader_reports_the_line_of_a_bad_process(tmp_path, extension):
+    processes = _processes(1, 10)
+    path = tmp_path / ("workload" + extension)
+    WRITERS[extension](path, processes)
+    with open(path, "a") as f:
+        f.write("x,1,1\n" if extension == ".csv" else '{"size": "x", "burst": 1}\n')
+    lines = len(path.read_text().splitlines())
+    reader = read_workload(str(path))
+    list(itertools.islice(reader, 6))
+    with pytest.raises(ValueError, match=f":{lines}:"):
+        list(read_workload(str(path), reader.position))
@@ -0,0 +1,287 @@
+import numpy as np
+
+#Vectorized First-Fit engine that runs many replicas of the same workload in lockstep
+#Each replica can have its own total memory size and CH/SC intervals. The state of all replicas lives in
+#NumPy arrays of shape (replicas, blocks) and (replicas, processes), and every tick is a handful of
+#batched array operations instead of one MemorySimulator per replica.
+#The results (timeline, start/finish times and the final block layout) match MemorySimulator in tick mode.
+
+WAITING = 0
+RUNNING = 1
+FINISHED = 2
+REJECTED = 3
+
+class VectorizedSimulator:
+    #Defines the constructor of the vectorized engine
+    #memory_sizes, ch_intervals and sc_intervals may each be a single number or one value per replica
+    def __init__(self, memory_sizes, ch_intervals, sc_intervals, process_inputs):
+        mem, ch, sc = np.broadcast_arrays(
+            np.asarray(memory_sizes, dtype=np.int64),
+            np.asarray(ch_intervals, dtype=np.int64),
+            np.asarray(sc_intervals, dtype=np.int64),
+        )
+        self.total_memory_size = np.atleast_1d(mem).copy()
+        self.ch_time = np.atleast_1d(ch).copy()
+        self.sc_time = np.atleast_1d(sc).copy()
+        self.num_replicas = len(self.total_memory_size)
+
+        self.process_sizes = np.array([p['size'] for p in process_inputs], dtype=np.int64)
+        self.process_bursts = np.array([p['burst'] for p in process_inputs], dtype=np.int64)
+        self.num_processes = len(self.process_sizes)
+
+        n, p = self.num_replicas, self.num_processes
+        #Every allocation splits at most one hole, so a replica never holds more than one block per process plus one
+        self.max_blocks = p + 1
+
+        #Block table, in address order per replica. Unused slots start at the end of memory with size 0.
+        #The table starts narrow and doubles in width as replicas fragment, so array operations only cover live slots.
+        b = min(self.max_blocks, 8)
+        self.block_start = np.repeat(self.total_memory_size[:, None], b, axis=1)
+        self.block_size = np.zeros((n, b), dtype=np.int64)
+        self.block_owner = np.full((n, b), -1, dtype=np.int64)
+        self.block_start[:, 0] = 0
+        self.block_size[:, 0] = self.total_memory_size
+        self.block_count = np.ones(n, dtype=np.int64)
+
+        self.state = np.where(self.process_sizes[None, :] > self.total_memory_size[:, None], REJECTED, WAITING).astype(np.int8)
+        self.remaining_time = np.zeros((n, p), dtype=np.int64)
+        self.start_time = np.full((n, p), -1, dtype=np.int64)
+        self.finish_time = np.full((n, p), -1, dtype=np.int64)
+
+        self.timeline = np.zeros(n, dtype=np.int64)
+        self.processes_completed = np.zeros(n, dtype=np.int64)
+        self.processes_rejected = (self.state == REJECTED).sum(axis=1)
+        self.active = self.processes_completed + self.processes_rejected < p
+        self.peak_fragmentation = np.zeros(n)
+        self.bytes_moved = np.zeros(n, dtype=np.int64)
+        self.blocks_moved = np.zeros(n, dtype=np.int64)
+
+        self._columns = np.arange(b)
+
+    #Helper method that widens the block table when a replica may need one more slot than it has
+    def _ensure_capacity(self):
+        width = self.block_start.shape[1]
+        if self.block_count.max() < width:
+            return
+        extra = min(self.max_blocks, 2 * width) - width
+        n = self.num_replicas
+        self.block_start = np.hstack([self.block_start, np.repeat(self.total_memory_size[:, None], extra, axis=1)])
+        self.block_size = np.hstack([self.block_size, np.zeros((n, extra), dtype=np.int64)])
+        self.block_owner = np.hstack([self.block_owner, np.full((n, extra), -1, dtype=np.int64)])
+        self._columns = np.arange(width + extra)
+
+    #Helper method that masks the block slots that are in use
+    def _valid(self, rows=slice(None)):
+        return self._columns < self.block_count[rows, None]
+
+    #Helper method that counts down the bursts of running processes and frees the blocks of finished ones
+    def _run_bursts(self, act):
+        running = (self.state == RUNNING) & act[:, None]
+        self.remaining_time -= running
+        finished = running & (self.remaining_time == 0)
+        if not finished.any():
+            return
+        self.state[finished] = FINISHED
+        self.finish_time[finished] = np.broadcast_to(self.timeline[:, None], finished.shape)[finished]
+        self.processes_completed += finished.sum(axis=1)
+
+        owner_index = np.where(self.block_owner > 0, self.block_owner - 1, 0)
+        freed = (self.block_owner > 0) & np.take_along_axis(finished, owner_index, axis=1)
+        self.block_owner[freed] = -1
+
+    #Helper method that lets every waiting process try First-Fit, in pid order like the scalar simulator
+    def _allocate_waiting(self, act):
+        waiting = (self.state == WAITING) & act[:, None]
+        if not waiting.any():
+            return
+
+        free = self._valid() & (self.block_owner == -1)
+        largest = np.where(free, self.block_size, 0).max(axis=1)
+
+        for j in np.flatnonzero(waiting.any(axis=0)):
+            size = self.process_sizes[j]
+            rows = np.flatnonzero(waiting[:, j] & (largest >= size))
+            if len(rows) == 0:
+                continue
+
+            sizes = self.block_size[rows]
+            owners = self.block_owner[rows]
+            fits = (self._columns < self.block_count[rows, None]) & (owners == -1) & (sizes >= size)
+            index = fits.argmax(axis=1)
+
+            hole_size = sizes[np.arange(len(rows)), index]
+            self.block_owner[rows, index] = j + 1
+            self.block_size[rows, index] = size
+
+            split = hole_size > size
+            if split.any():
+                self._ensure_capacity()
+                self._insert_holes(rows[split], index[split] + 1, hole_size[split] - size)
+
+            self.state[rows, j] = RUNNING
+            self.remaining_time[rows, j] = self.process_bursts[j]
+            self.start_time[rows, j] = self.timeline[rows]
+
+            self._refresh_largest(rows, largest)
+
+    #Helper method that inserts new holes at the given slot of each row, shifting the later blocks right
+    def _insert_holes(self, rows, position, size):
+        source = np.where(self._columns > position[:, None], self._columns - 1, self._columns)
+        for table in (self.block_start, self.block_size, self.block_owner):
+            table[rows] = np.take_along_axis(table[rows], source, axis=1)
+
+        self.block_start[rows, position] = self.block_start[rows, position - 1] + self.block_size[rows, position - 1]
+        self.block_size[rows, position] = size
+        self.block_owner[rows, position] = -1
+        self.block_count[rows] += 1
+
+    #Helper method that recomputes the largest hole of the given rows after an allocation
+    def _refresh_largest(self, rows, largest):
+        free = self._valid(rows) & (self.block_owner[rows] == -1)
+        largest[rows] = np.where(free, self.block_size[rows], 0).max(axis=1)
+
+    #Helper method that writes a new block order into the given rows, leaving unused slots empty
+    def _reorder(self, rows, order, count):
+        for table in (self.block_start, self.block_size, self.block_owner):
+            table[rows] = np.take_along_axis(table[rows], order, axis=1)
+        unused = self._columns >= count[:, None]
+        memory = np.broadcast_to(self.total_memory_size[rows, None], unused.shape)
+        starts = self.block_start[rows]
+        starts[unused] = memory[unused]
+        self.block_start[rows] = starts
+        sizes = self.block_size[rows]
+        sizes[unused] = 0
+        self.block_size[rows] = sizes
+        owners = self.block_owner[rows]
+        owners[unused] = -1
+        self.block_owner[rows] = owners
+        self.block_count[rows] = count
+
+    #Function that implements the Coalescing Holes (CH) technique on every replica in rows
+    def _coalesce(self, rows):
+        valid = self._valid(rows)
+        free = valid & (self.block_owner[rows] == -1)
+        follows_free = np.zeros_like(free)
+        follows_free[:, 1:] = free[:, :-1]
+        keep = valid & ~(free & follows_free)
+
+        order = np.argsort(~keep, axis=1, kind="stable")
+        self._reorder(rows, order, keep.sum(axis=1))
+
+        #Blocks tile memory without gaps, so each kept block now reaches up to the start of the next one
+        starts = self.block_start[rows]
+        next_start = np.empty_like(starts)
+        next_start[:, :-1] = starts[:, 1:]
+        next_start[:, -1] = self.total_memory_size[rows]
+        self.block_size[rows] = np.where(self._valid(rows), next_start - starts, 0)
+
+    #Function that implements the Storage Compaction (SC) technique on every replica in rows
+    def _compact(self, rows):
+        allocated = self._valid(rows) & (self.block_owner[rows] > 0)
+        order = np.argsort(~allocated, axis=1, kind="stable")
+        count = allocated.sum(axis=1)
+        self._reorder(rows, order, count)
+
+        sizes = self.block_size[rows]
+        used_before = np.cumsum(sizes, axis=1) - sizes
+        valid = self._valid(rows)
+        moved = valid & (used_before != self.block_start[rows])
+        self.bytes_moved[rows] += np.where(moved, sizes, 0).sum(axis=1)
+        self.blocks_moved[rows] += moved.sum(axis=1)
+        self.block_start[rows] = np.where(valid, used_before, self.block_start[rows])
+
+        used = sizes.sum(axis=1)
+        memory = self.total_memory_size[rows]
+        has_hole = used < memory
+        hole_rows = rows[has_hole]
+        slot = count[has_hole]
+        self.block_start[hole_rows, slot] = used[has_hole]
+        self.block_size[hole_rows, slot] = memory[has_hole] - used[has_hole]
+        self.block_owner[hole_rows, slot] = -1
+        self.block_count[hole_rows] += 1
+
+    #Helper method that rejects the waiting processes of replicas where no hole can ever grow large enough
+    #That is the case once nothing is running and neither CH nor SC is enabled, like in the scalar simulator
+    def _reject_stuck(self, act):
+        waiting = self.state == WAITING
+        stuck = act & (self.ch_time == 0) & (self.sc_time == 0) & ~(self.state == RUNNING).any(axis=1) & waiting.any(axis=1)
+        if not stuck.any():
+            return
+        rejected = waiting & stuck[:, None]
+        self.state[rejected] = REJECTED
+        self.processes_rejected += rejected.sum(axis=1)
+
+    #Helper method that records the peak external fragmentation of every active replica
+    def _track_fragmentation(self, act):
+        free = self._valid() & (self.block_owner == -1)
+        free_sizes = np.where(free, self.block_size, 0)
+        total = free_sizes.sum(axis=1)
+        largest = free_sizes.max(axis=1)
+        fragmentation = np.where(total > 0, 1 - largest / np.maximum(total, 1), 0.0)
+        self.peak_fragmentation = np.where(act, np.maximum(self.peak_fragmentation, fragmentation), self.peak_fragmentation)
+
+    #Function that advances every unfinished replica by one tick
+    #Returns False once all replicas have finished
+    def step(self):
+        act = self.active
+        if not act.any():
+            return False
+
+        self.timeline[act] += 1
+        self._run_bursts(act)
+        self._allocate_waiting(act)
+
+        ch_rows = np.flatnonzero(act & (self.ch_time > 0) & (self.timeline % np.maximum(self.ch_time, 1) == 0))
+        if len(ch_rows):
+            self._coalesce(ch_rows)
+        sc_rows = np.flatnonzero(act & (self.sc_time > 0) & (self.timeline % np.maximum(self.sc_time, 1) == 0))
+        if len(sc_rows):
+            self._compact(sc_rows)
+
+        self._reject_stuck(act)
+        self._track_fragmentation(act)
+        self.active = self.processes_completed + self.processes_rejected < self.num_processes
+        return True
+
+    #Function that runs all replicas to completion, or until their timeline reaches max_time
+    def run(self, max_time=None):
+        while self.step():
+            if max_time is not None and self.timeline.max() >= max_time:
+                self.active &= self.timeline < max_time
+        return self
+
+    #Returns the memory blocks of one replica as (start, end, size, is_free, pid) tuples in address order
+    def blocks(self, replica):
+        count = self.block_count[replica]
+        return [
+            (int(start), int(start + size - 1), int(size), owner == -1, int(owner))
+            for start, size, owner in zip(
+                self.block_start[replica, :count], self.block_size[replica, :count], self.block_owner[replica, :count]
+            )
+        ]
+
+    #Returns the summary metrics of every replica, with the same fields as the headless runner
+    def summary(self, workload=""):
+        started = self.start_time >= 0
+        waits = np.where(started, self.start_time - 1, 0).sum(axis=1)
+        counts = started.sum(axis=1)
+        average_wait = np.where(counts > 0, waits / np.maximum(counts, 1), 0.0)
+        return [
+            {
+                "workload": workload,
+                "policy": "first_fit",
+                "total_memory": int(self.total_memory_size[r]),
+                "ch_interval": int(self.ch_time[r]),
+                "sc_interval": int(self.sc_time[r]),
+                "compaction": "full",
+                "processes": self.num_processes,
+                "completed": int(self.processes_completed[r]),
+                "rejected": int(self.processes_rejected[r]),
+                "makespan": int(self.timeline[r]),
+                "average_wait": round(float(average_wait[r]), 4),
+                "peak_fragmentation": round(float(self.peak_fragmentation[r]), 4),
+                "bytes_moved": int(self.bytes_moved[r]),
+                "blocks_moved": int(self.blocks_moved[r]),
+            }
+            for r in range(self.num_replicas)
+        ]
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+
+#Background runner that drives a MemorySimulator off the GUI thread
+#The worker owns the simulator while it runs and publishes read-only snapshots of its state through a queue,
+#so the GUI can redraw at its own frame rate no matter how fast or slow the simulation steps.
+
+#Defines a read-only copy of the simulator state at one point in the timeline
+#error holds the message of the exception that ended the simulation, or None when it did not fail
+class SimulationSnapshot:
+    __slots__ = ("timeline", "processes_completed", "processes_rejected", "num_processes", "blocks", "metrics", "done",
+                 "error")
+
+    def __init__(self, sim, done, error=None):
+        self.timeline = sim.timeline
+        self.processes_completed = sim.processes_completed
+        self.processes_rejected = sim.processes_rejected
+        self.num_processes = sim.num_processes
+        self.blocks = [(b.start, b.end, b.size, b.is_free, b.pid) for b in sim.memory_blocks]
+        self.metrics = sim.metrics_snapshot()
+        self.done = done
+        self.error = error
+
+class SimulationWorker(threading.Thread):
+    #Defines the constructor of the worker
+    #ticks_per_second throttles the simulation; snapshot_interval limits how often snapshots are published
+    def __init__(self, simulation, ticks_per_second=1.0, snapshot_interval=1 / 60):
+        super().__init__(daemon=True)
+        self.simulation = simulation
+        self.snapshots = queue.Queue()
+        self.snapshot_interval = snapshot_interval
+
+        self._condition = threading.Condition()
+        self._ticks_per_second = ticks_per_second
+        self._next_tick = 0.0
+        self._paused = False
+        self._steps_requested = 0
+        self._run_to_end = False
+        self._stopped = False
+        self._unpublished = False
+
+    #Changes how many ticks the worker runs per second
+    def set_speed(self, ticks_per_second):
+        with self._condition:
+            self._ticks_per_second = ticks_per_second
+            self._next_tick = min(self._next_tick, time.monotonic() + 1 / ticks_per_second)
+            self._condition.notify()
+
+    #Pauses or resumes the simulation
+    def set_paused(self, paused):
+        with self._condition:
+            self._paused = paused
+            self._next_tick = time.monotonic()
+            self._condition.notify()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    #Runs exactly one more step while paused
+    def step_once(self):
+        with self._condition:
+            self._steps_requested += 1
+            self._condition.notify()
+
+    #Stops throttling and runs the simulation to its end as fast as possible
+    def run_to_end(self):
+        with self._condition:
+            self._run_to_end = True
+            self._paused = False
+            self._condition.notify()
+
+    #Stops the worker, for example when the window is closed
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    #Helper method that waits until the next step is due and reports whether the worker should keep going
+    def _wait_for_turn(self):
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return False
+                if self._paused:
+                    if self._steps_requested:
+                        self._steps_requested -= 1
+                        return True
+                    if self._unpublished:
+                        self._publish()
+                    self._condition.wait()
+                    continue
+                if self._run_to_end:
+                    return True
+                delay = self._next_tick - time.monotonic()
+                if delay <= 0:
+                    self._next_tick = max(self._next_tick, time.monotonic() - 1) + 1 / self._ticks_per_second
+                    return True
+                self._condition.wait(delay)
+
+    def _publish(self, done=False, error=None):
+        self.snapshots.put(SimulationSnapshot(self.simulation, done, error))
+        self._unpublished = False
+
+    def run(self):
+        self._publish()
+        last_snapshot = time.monotonic()
+        self._next_tick = last_snapshot + 1 / self._ticks_per_second
+        while self._wait_for_turn():
+            #A simulation that fails, like one reading a broken workload file, ends the run with a final snapshot
+            #that carries the error instead of ending the thread without one
+            try:
+                is_running = self.simulation.step()
+            except Exception as e:
+                self._publish(done=True, error=str(e) or type(e).__name__)
+                return
+            if not is_running:
+                self._publish(done=True)
+                return
+            now = time.monotonic()
+            if self._paused or now - last_snapshot >= self.snapshot_interval:
+                self._publish()
+                last_snapshot = now
+            else:
+                self._unpublished = True
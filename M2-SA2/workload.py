@@ -0,0 +1,133 @@
+import csv
+import json
+import random
+
+#Readers for workload files, the lists of processes a simulation runs
+#Every process has a size and a burst time, and optionally the arrival time at which it enters the queue (default 0).
+#CSV and JSONL files are read one line at a time, so a simulation can stream workloads of any length, and a reader
+#can start again at the byte offset where an earlier one stopped. JSON files hold a single list and are read as a whole.
+#generate_workload creates random workloads that are the same for the same seed.
+
+#Function that returns an iterator over the {'size', 'burst', 'arrival'} entry of every process in a workload file
+#CSV files need a header row with size and burst columns and may have an arrival column;
+#JSONL files hold one object per line and JSON files a list of objects with the same keys
+#position is the position of a WorkloadReader of the same file, to go on from where that reader was
+def read_workload(path, position=None):
+    return WorkloadReader(path, position)
+
+#Iterator over the entries of a workload file that knows where in the file it is
+#position is [byte offset, line number] of the next line for CSV and JSONL files, which are read from there on
+#without parsing the lines before it again, and [index, index] of the next entry for JSON files
+class WorkloadReader:
+    def __init__(self, path, position=None):
+        self.path = path
+        offset, self.line = position if position is not None else (0, 0)
+        lower = path.lower()
+        self._file = None
+        if lower.endswith(".csv"):
+            self._file = open(path, "rb")
+            self._rows = csv.reader(self._lines())
+            self.offset = 0
+            self._fields = next(self._rows, [])
+            if position is None:
+                self.line = 1
+            else:
+                self._file.seek(offset)
+                self.offset = offset
+            self._next = self._csv_entries().__next__
+        elif lower.endswith(".jsonl"):
+            self._file = open(path, "rb")
+            self._file.seek(offset)
+            self.offset = offset
+            self._next = self._jsonl_entries().__next__
+        else:
+            with open(path) as f:
+                self._entries = json.load(f)
+            if not isinstance(self._entries, list):
+                raise ValueError(f"{path}: a JSON workload must hold a list of processes.")
+            self.offset = offset
+            self._next = self._next_json
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._next()
+        except StopIteration:
+            self.close()
+            raise
+
+    @property
+    def position(self):
+        return [self.offset, self.line]
+
+    #Closes the file, which also happens once every entry has been read
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    #Helper method that yields the lines of a CSV file to the csv module, counting their bytes
+    def _lines(self):
+        for line in self._file:
+            self.offset += len(line)
+            yield line.decode()
+
+    def _csv_entries(self):
+        rows = self._rows
+        line_num = rows.line_num
+        for values in rows:
+            self.line += rows.line_num - line_num
+            line_num = rows.line_num
+            if values:
+                yield _parse_entry(self.path, self.line, dict(zip(self._fields, values)))
+
+    def _jsonl_entries(self):
+        for text in self._file:
+            self.offset += len(text)
+            self.line += 1
+            if text.strip():
+                yield _parse_entry(self.path, self.line, json.loads(text.decode()))
+
+    def _next_json(self):
+        if self.offset >= len(self._entries):
+            raise StopIteration
+        row = self._entries[self.offset]
+        self.offset += 1
+        self.line = self.offset
+        return _parse_entry(self.path, self.line, row)
+
+#Function that yields the validated {'size', 'burst', 'arrival'} entry of every process in a list of dicts,
+#such as processes received from another program; source names the list in error messages
+def parse_entries(rows, source="processes"):
+    for i, row in enumerate(rows):
+        yield _parse_entry(source, i + 1, row)
+
+#Helper function that validates one process of a workload file
+def _parse_entry(path, line, row):
+    try:
+        size = int(row["size"])
+        burst = int(row["burst"])
+        arrival = int(row.get("arrival") or 0)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{path}:{line}: every process needs a size and a burst number.")
+    if size <= 0 or burst <= 0 or arrival < 0:
+        raise ValueError(f"{path}:{line}: size and burst must be positive numbers and arrival must be >= 0.")
+    return {'size': size, 'burst': burst, 'arrival': arrival}
+
+#Function that yields the {'size', 'burst', 'arrival'} entries of count random processes
+#Sizes and bursts are drawn uniformly from the inclusive (low, high) ranges. With arrivals_per_tick,
+#that many processes arrive at every tick starting at 0; without it every process arrives at 0.
+#The same seed always gives the same workload.
+def generate_workload(count, seed=0, size_range=(1, 100), burst_range=(1, 10), arrivals_per_tick=None):
+    if count < 0:
+        raise ValueError("The number of processes must be >= 0.")
+    if not 0 < size_range[0] <= size_range[1] or not 0 < burst_range[0] <= burst_range[1]:
+        raise ValueError("Size and burst ranges must be positive with low <= high.")
+    if arrivals_per_tick is not None and arrivals_per_tick <= 0:
+        raise ValueError("Arrivals per tick must be a number > 0.")
+    rng = random.Random(seed)
+    randint = rng.randint
+    for i in range(count):
+        arrival = i // arrivals_per_tick if arrivals_per_tick else 0
+        yield {'size': randint(*size_range), 'burst': randint(*burst_range), 'arrival': arrival}